@@ -0,0 +1,132 @@
+"""Parses an adversarial corpus with and without the length validation pre-pass.
+
+Every sample is a valid WVD/PRD file whose declared lengths were then made hostile:
+pushed past the end of the buffer, set to the field maximum (0xFFFF / 0xFFFFFFFF), or
+left intact on a truncated copy. Files are padded up to --size bytes so that a parser
+that copies or walks the buffer pays for it. The report shows per-file time (p50, p99
+and max) and the largest tracemalloc peak. With the pre-pass, the worst case should
+stay near the cost of reading the header, whatever lengths the file declares. Valid
+files are timed too, to show what the pre-pass costs when it accepts a file.
+
+Usage: python benchmarks/bench_adversarial.py [--samples N] [--size BYTES]
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_playready, build_widevine
+from modules import playready, widevine
+from modules.api import parse_device_buffer
+from modules.logger import setup_logging
+
+FORMATS = [
+    ("Widevine v1", lambda: build_widevine(1, 1216, 2048, 512), "wvd"),
+    ("Widevine v2", lambda: build_widevine(2, 1216, 2048), "wvd"),
+    ("PlayReady v1", lambda: build_playready(1, 2048, 96), "prd"),
+    ("PlayReady v2", lambda: build_playready(2, 2048), "prd"),
+    ("PlayReady v3", lambda: build_playready(3, 2048), "prd"),
+]
+
+
+def length_field(data):
+    """``(offset, code)`` of the first declared length in a built file."""
+    if data[:3] == b"WVD":
+        return 7, ">H"  # private_key_len
+    if data[3] == 3:
+        return 292, ">I"  # group_certificate_length after the three 96-byte keys
+    return 4, ">I"
+
+
+def hostile(data, size):
+    """Copies of ``data`` with hostile lengths, padded with random bytes up to ``size``."""
+    offset, code = length_field(data)
+    width = struct.calcsize(code)
+    maximum = (1 << (8 * width)) - 1
+    padding = random.randbytes(max(0, size - len(data)))
+
+    samples = [data[:offset] + struct.pack(code, value) + data[offset + width:] + padding
+               for value in (maximum, min(size, maximum), random.randint(len(data), maximum))]
+    # A damaged magic falls back to the extension and tries every version
+    samples.append(b"\x00" + samples[0][1:])
+    samples.append(data[:random.randint(8, len(data) - 1)])
+    return samples
+
+
+def corpus(samples, size, seed, adversarial=True):
+    """Yields ``(data, extension)`` one file at a time; the same seed gives the same files."""
+    random.seed(seed)
+    for _, builder, extension in FORMATS:
+        for _ in range(samples):
+            data = builder()
+            for sample in (hostile(data, size) if adversarial else [data]):
+                yield sample, extension
+
+
+def measure(make_samples):
+    """Per-file parse times (sorted) and the largest tracemalloc peak; ``make_samples()`` yields the corpus."""
+    times = []
+    for data, extension in make_samples():
+        started = time.perf_counter()
+        parse_device_buffer(data, f"sample.{extension}")
+        times.append(time.perf_counter() - started)
+    times.sort()
+
+    # Separate pass: tracemalloc would distort the timings
+    peak = 0
+    for data, extension in make_samples():
+        tracemalloc.start()
+        parse_device_buffer(data, f"sample.{extension}")
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return times, peak
+
+
+def without_prepass():
+    """Swaps the pre-pass out of both parsers; returns a function that puts it back."""
+    originals = playready.validate_lengths, widevine.validate_lengths
+    playready.validate_lengths = widevine.validate_lengths = lambda candidates, buffer, *args: [(*candidate, len(buffer)) for candidate in candidates]
+
+    def restore():
+        playready.validate_lengths, widevine.validate_lengths = originals
+    return restore
+
+
+def report(label, make_samples):
+    restore = without_prepass()
+    try:
+        before = measure(make_samples)
+    finally:
+        restore()
+    after = measure(make_samples)
+
+    print(f"{label} ({len(before[0])} files)")
+    print(f"  {'':<12} {'p50 us':>10} {'p99 us':>10} {'max us':>10} {'peak KB':>10}")
+    for name, (times, peak) in (("no pre-pass", before), ("pre-pass", after)):
+        p50, p99, worst = times[len(times) // 2], times[int(len(times) * 0.99)], times[-1]
+        print(f"  {name:<12} {p50 * 1e6:>10.1f} {p99 * 1e6:>10.1f} {worst * 1e6:>10.1f} {peak / 1024:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100, help="source files per format")
+    parser.add_argument("--size", type=int, default=1024 * 1024, help="pad hostile files to this many bytes")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Keep the log file (its cost is part of the measurement) but not the console output
+    setup_logging(console=False)
+
+    # Warm up imports and caches so neither run pays for them
+    measure(lambda: corpus(2, 0, args.seed, adversarial=False))
+    report("adversarial", lambda: corpus(args.samples, args.size, args.seed))
+    report("valid", lambda: corpus(args.samples, 0, args.seed, adversarial=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Times the fast decoders against the construct structs per format.
+
+tests/test_fastpath.py checks that both decode every format identically.
+
+Usage: python benchmarks/bench_fastpath.py [--iterations N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_keybox, build_playready, build_widevine
+from modules.fastpath import KeyboxFast, PLAYREADY_DECODERS, WIDEVINE_DECODERS
+from modules.keybox import KeyboxStruct
+from modules.playready import PlayReadyDeviceStruct
+from modules.widevine import WidevineDeviceStruct
+
+FORMATS = [
+    ("Widevine v1", lambda: build_widevine(1, random.randint(0, 2048), random.randint(0, 4096), random.randint(0, 1024)),
+     WidevineDeviceStruct.WidevineDeviceStructVersion_1, WIDEVINE_DECODERS[1]),
+    ("Widevine v2", lambda: build_widevine(2, random.randint(0, 2048), random.randint(0, 4096)),
+     WidevineDeviceStruct.WidevineDeviceStructVersion_2, WIDEVINE_DECODERS[2]),
+    ("PlayReady v1", lambda: build_playready(1, random.randint(0, 4096), random.randint(0, 256)),
+     PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_1, PLAYREADY_DECODERS[1]),
+    ("PlayReady v2", lambda: build_playready(2, random.randint(0, 4096)),
+     PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_2, PLAYREADY_DECODERS[2]),
+    ("PlayReady v3", lambda: build_playready(3, random.randint(0, 4096)),
+     PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_3, PLAYREADY_DECODERS[3]),
+    ("Keybox", build_keybox, KeyboxStruct.Keybox, KeyboxFast),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'format':<14} {'construct':>12} {'fast':>12} {'speedup':>9}")
+    for name, builder, reference, fast in FORMATS:
+        data = builder()
+        construct_time = min(timeit.repeat(lambda: reference.parse(data), number=args.iterations, repeat=3))
+        fast_time = min(timeit.repeat(lambda: fast.parse(data), number=args.iterations, repeat=3))
+        print(f"{name:<14} {construct_time / args.iterations * 1e6:9.2f} us {fast_time / args.iterations * 1e6:9.2f} us "
+              f"{construct_time / fast_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Keybox container throughput: parse_keybox_container against parse_keybox_data once per record.
+
+Writes a container of concatenated 128-byte keyboxes, a few with a damaged magic or CRC,
+and checks that both paths agree on every record's fields, CRC verdict and magic before
+timing them. The per-record path builds the full report (hex, base64, AES metadata) that
+parse_keybox returns for a single file, minus the file read. The container path is timed
+without and with metadata decryption.
+
+Usage: python benchmarks/bench_keyboxes.py [--records N] [--damaged-ratio R]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import build_keybox
+from modules.keybox import parse_keybox_container, parse_keybox_data
+
+
+def build_container(path, records, damaged_ratio):
+    with open(path, "wb") as file:
+        for _ in range(records):
+            keybox = bytearray(build_keybox())
+            if random.random() < damaged_ratio:
+                keybox[random.choice((5, 126))] ^= 0xFF  # body (CRC mismatch) or magic
+            file.write(keybox)
+
+
+def per_record(path):
+    with open(path, "rb") as file:
+        data = memoryview(file.read())
+    return [parse_keybox_data(data[offset:offset + 128]) for offset in range(0, len(data), 128)]
+
+
+def differential(path):
+    table = parse_keybox_container(path)
+    reports = per_record(path)
+    with open(path, "rb") as file:
+        data = file.read()
+    for index, (parsed, _, _, crc_valid, _, decrypted, _) in enumerate(reports):
+        row = table.row(index, decrypt=True)
+        expected = {
+            "stable_id": parsed["Stable ID"],
+            "device_id": parsed["Device ID"],
+            "body_crc": parsed["Body CRC"],
+            "crc_valid": crc_valid,
+            "magic_valid": data[index * 128 + 124:index * 128 + 128] == b"kbox",
+            "decrypted_metadata": decrypted,
+        }
+        actual = {field: row[field] for field in expected}
+        if actual != expected:
+            raise AssertionError(f"record {index}: {actual} != {expected}")
+    return table
+
+
+def decrypt_all(path):
+    table = parse_keybox_container(path)
+    return [table.decrypted_metadata(index) for index in range(table.count)]
+
+
+def best_of(rounds, func, *args):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--damaged-ratio", type=float, default=0.01)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "keyboxes.bin")
+        build_container(path, args.records, args.damaged_ratio)
+        table = differential(path)
+
+        timings = [
+            ("parse_keybox_data per record", best_of(args.rounds, per_record, path)),
+            ("container", best_of(args.rounds, parse_keybox_container, path)),
+            ("container + decrypt", best_of(args.rounds, decrypt_all, path)),
+        ]
+
+    print(f"{'records':<29}: {table.count:,} ({len(table.invalid()):,} invalid, all identical across both paths)")
+    baseline = timings[0][1]
+    for name, elapsed in timings:
+        print(f"{name:<29}: {table.count / elapsed:>12,.0f} records/s {baseline / elapsed:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Per-format parse benchmark over a synthetic corpus.
+
+For every format it reports the p50/p99 latency of the format parser on an in-memory
+buffer and of the full read_device_file call (open, read, detect, parse), files per
+second and the tracemalloc peak of a single parse. Results can be saved as JSON and
+compared against an earlier run.
+
+Usage: python benchmarks/bench_parse.py [--per-format N] [--scale S] [--corrupt-ratio R]
+                                        [--json PATH] [--compare PATH]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import generate_corpus
+from main import parse_device_buffer, read_device_file
+from modules import keybox
+from modules.logger import setup_logging
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def time_calls(func, items, rounds):
+    samples = []
+    for _ in range(rounds):
+        for item in items:
+            started = time.perf_counter()
+            func(item)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def peak_memory(func, items):
+    """Largest tracemalloc peak seen while running func once per item."""
+    peak = 0
+    tracemalloc.start()
+    try:
+        for item in items:
+            tracemalloc.reset_peak()
+            func(item)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def summarize(samples):
+    return {
+        "p50_us": percentile(samples, 0.50) * 1e6,
+        "p99_us": percentile(samples, 0.99) * 1e6,
+        "files_per_second": len(samples) / sum(samples) if sum(samples) else 0.0,
+    }
+
+
+def run(manifest, rounds):
+    by_format = {}
+    for entry in manifest:
+        by_format.setdefault(entry["format"], []).append(entry["path"])
+
+    results = {}
+    for name, paths in by_format.items():
+        buffers = []
+        for path in paths:
+            with open(path, "rb") as file:
+                buffers.append((file.read(), path))
+
+        # Warm up imports and per-process caches before timing
+        for data, path in buffers[:2]:
+            parse_device_buffer(data, path)
+
+        parse_samples = time_calls(lambda item: parse_device_buffer(*item), buffers, rounds)
+        read_samples = time_calls(read_device_file, paths, rounds)
+        results[name] = {
+            "files": len(paths),
+            "parse": summarize(parse_samples),
+            "read_device_file": summarize(read_samples),
+            "peak_memory_bytes": peak_memory(read_device_file, paths),
+        }
+    return results
+
+
+def print_results(results, baseline=None):
+    header = f"{'format':<14} {'parse p50':>10} {'parse p99':>10} {'read p50':>10} {'read p99':>10} {'files/s':>10} {'peak mem':>10}"
+    print(header + ("   read p50 vs baseline" if baseline else ""))
+    for name, result in results.items():
+        parse, read = result["parse"], result["read_device_file"]
+        line = (f"{name:<14} {parse['p50_us']:8.1f}us {parse['p99_us']:8.1f}us {read['p50_us']:8.1f}us "
+                f"{read['p99_us']:8.1f}us {read['files_per_second']:10.0f} {result['peak_memory_bytes'] / 1024:8.1f}KB")
+        previous = (baseline or {}).get(name)
+        if previous:
+            change = read["p50_us"] / previous["read_device_file"]["p50_us"] - 1
+            line += f"   {change:+.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--per-format", type=int, default=100)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--corrupt-ratio", type=float, default=0.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", default=None, help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", default=None, help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    # The log file stays part of the cost; console output would only add terminal noise
+    setup_logging(console=False)
+    # XML keyboxes would otherwise fetch the live revocation list; keep runs offline and repeatable
+    keybox.check_keybox_revocation = lambda: {"entries": {}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        manifest = generate_corpus(directory, args.per_format, args.corrupt_ratio, args.scale, args.seed)
+        results = run(manifest, args.rounds)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "settings": vars(args),
+                "results": results,
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
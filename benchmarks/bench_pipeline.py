@@ -0,0 +1,71 @@
+"""Slow-storage benchmark: the process-pool batch against the asyncio read pipeline.
+
+Every file read is delayed by --latency-ms to stand in for network-mounted storage. The
+batch runner reads inside its workers, so at most --workers reads overlap; the pipeline
+keeps --max-reads reads in flight and only parses on the workers. Results from both
+runs are compared before the timings are printed.
+
+Usage: python benchmarks/bench_pipeline.py [--files N] [--latency-ms MS] [--workers W] [--max-reads R]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import write_mixed_corpus
+from main import parse_device_buffer, read_device_file
+from modules import pipeline
+from modules.batch import run_batch
+from modules.logger import setup_logging
+
+
+def slow_read_device_file(latency, file_path):
+    time.sleep(latency)
+    return read_device_file(file_path)
+
+
+def slow_read_file(latency, file_path):
+    time.sleep(latency)
+    with open(file_path, "rb") as file:
+        return file.read()
+
+
+def timed(results):
+    started = time.perf_counter()
+    collected = {result.file_path: (result.device_type, result.data, result.error) for result in results}
+    return collected, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-reads", type=int, default=64)
+    args = parser.parse_args()
+
+    setup_logging(console=False)
+    latency = args.latency_ms / 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_mixed_corpus(directory, args.files)
+
+        batch, batch_time = timed(run_batch(paths, partial(slow_read_device_file, latency), workers=args.workers))
+
+        pipeline.read_file = partial(slow_read_file, latency)
+        piped, pipeline_time = timed(pipeline.run_pipeline(paths, parse_device_buffer, workers=args.workers,
+                                                           max_reads=args.max_reads))
+
+    if batch != piped:
+        raise SystemExit("pipeline results differ from the batch runner")
+    print(f"{args.files} files, {args.latency_ms:g} ms read latency, {args.workers} workers")
+    print(f"{'process pool':<22} {batch_time:7.2f} s {args.files / batch_time:9.1f} files/s")
+    print(f"{'asyncio pipeline':<22} {pipeline_time:7.2f} s {args.files / pipeline_time:9.1f} files/s")
+
+
+if __name__ == "__main__":
+    main()
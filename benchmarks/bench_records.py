@@ -0,0 +1,82 @@
+"""Memory benchmark: lazy records against the current parse results.
+
+For every binary format it keeps N parsed results alive and reports the traced bytes
+per result for the current representation (normalized Container dicts, and the
+hex + base64 tuple from parse_keybox_data for keyboxes) and for modules.records.
+The record count includes the file buffer the record keeps. Before measuring, every
+record is checked field by field against the current parser.
+
+Usage: python benchmarks/bench_records.py [--count N] [--scale S]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import format_builders
+from main import parse_device_buffer
+from modules.keybox import parse_keybox_data
+from modules.logger import setup_logging
+from modules.records import parse_record
+from modules.utils import normalize_result
+
+
+def current_result(data):
+    if len(data) == 128:
+        return parse_keybox_data(data)
+    return normalize_result(parse_device_buffer(data)[0])
+
+
+def check_record(name, data):
+    record = parse_record(data)
+    if name == "keybox":
+        parsed_keybox, base64_keybox, _, crc_valid, crc_with_magic, decrypted_metadata, _ = parse_keybox_data(data)
+        expected = (parsed_keybox["Stable ID"], base64_keybox["Device ID"], crc_valid, crc_with_magic, decrypted_metadata)
+        actual = (record.hex("stable_id"), record.base64("device_id"), record.crc_valid, record.crc_with_magic, record.decrypted_metadata)
+    else:
+        expected, actual = current_result(data), record.to_dict()
+    if expected != actual:
+        raise SystemExit(f"{name}: record does not match the current parser\n  expected {expected}\n  actual   {actual}")
+
+
+def retained_bytes(build, builder, count):
+    """Traced memory still held by ``count`` results after the temporaries are gone."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    results = [build(builder()) for _ in range(count)]
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    return retained / count, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    setup_logging(console=False)
+    formats = [entry for entry in format_builders(args.scale) if entry[1] != "xml"]
+
+    for name, _, builder in formats:
+        for _ in range(20):
+            check_record(name, builder())
+
+    print(f"{'format':<14} {'current B/result':>17} {'record B/result':>16} {'ratio':>7} {'current ms':>11} {'record ms':>10}")
+    for name, _, builder in formats:
+        current, current_time = retained_bytes(current_result, builder, args.count)
+        record, record_time = retained_bytes(parse_record, builder, args.count)
+        print(f"{name:<14} {current:17,.0f} {record:16,.0f} {current / record:6.1f}x "
+              f"{current_time * 1000:11.1f} {record_time * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Output benchmark: records per second for each renderer against the old per-field print loop.
+
+Every backend writes to /dev/null, so the numbers measure formatting and write overhead only.
+The sink is line buffered like a terminal unless --block-buffered is given (as when piped).
+
+Usage: python benchmarks/bench_render.py [--records N] [--blobs MODE] [--block-buffered]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorama import Fore, Style
+from benchmarks.corpus import build_keybox, build_playready, build_widevine
+from main import parse_device_buffer
+from modules.logger import setup_logging
+from modules.registry import get_presenter
+from modules.render import RENDERERS, parse_blob_mode
+from modules.utils import convert_bytes_to_base64, normalize_result
+
+
+def print_per_field(data, device_type, stream):
+    """The pre-renderer pretty_print: one print() per field, every blob encoded up front."""
+    print(f"\n{Fore.CYAN}╔════════════════════════════════════════════════════════════════════╗{Style.RESET_ALL}", file=stream)
+    print(f"{Fore.CYAN}                      {Fore.YELLOW}Parsed {device_type} Data                  {Fore.CYAN} {Style.RESET_ALL}", file=stream)
+    print(f"{Fore.CYAN}╚════════════════════════════════════════════════════════════════════╝{Style.RESET_ALL}", file=stream)
+    for field, value in data.items():
+        if isinstance(value, bytes):
+            value = convert_bytes_to_base64(value)
+        elif isinstance(value, int):
+            value = f"{value:,}"
+        print(f"{Fore.MAGENTA}{field.replace('_', ' ').title():<30}:{Style.RESET_ALL} {Fore.WHITE}{value}{Style.RESET_ALL}", file=stream)
+    print(Fore.CYAN + "═" * 70 + Style.RESET_ALL + "\n", file=stream)
+
+
+def sample_records():
+    """``(stored, report, device_type)``: what the renderers get, and the report the old loop printed.
+
+    Formats with a presenter (keyboxes) used to encode their report at parse time, so the
+    per-field baseline gets it precomputed while the renderers build it as they write.
+    """
+    records = []
+    for data in (build_widevine(2), build_widevine(1), build_playready(3), build_playready(1), build_keybox()):
+        parsed, device_type = parse_device_buffer(data)
+        stored = normalize_result(parsed)
+        presenter = get_presenter(device_type)
+        records.append((stored, presenter(stored) if presenter else stored, device_type))
+    return records
+
+
+def measure(write, records, count, report=False):
+    started = time.perf_counter()
+    for index in range(count):
+        stored, presented, device_type = records[index % len(records)]
+        write(presented if report else stored, device_type, f"device_{index:06d}")
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--blobs", type=parse_blob_mode, default=("full", 0))
+    parser.add_argument("--block-buffered", action="store_true")
+    args = parser.parse_args()
+
+    setup_logging(console=False)
+    records = sample_records()
+
+    with open(os.devnull, "w", encoding="utf-8", buffering=-1 if args.block_buffered else 1) as sink:
+        rates = {"print per field": measure(lambda data, device_type, _: print_per_field(data, device_type, sink),
+                                            records, args.records, report=True)}
+        for name, renderer_class in RENDERERS.items():
+            renderer = renderer_class(sink, args.blobs)
+            rates[name] = measure(renderer.write, records, args.records)
+            renderer.close()
+
+    print(f"{'backend':<18} {'records/s':>12}")
+    for name, rate in rates.items():
+        print(f"{name:<18} {rate:12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
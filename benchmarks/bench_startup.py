@@ -0,0 +1,87 @@
+"""Measures interpreter startup cost with ``python -X importtime``.
+
+Runs each scenario in a fresh interpreter, reports the cumulative import time of the
+top-level modules it pulls in and, with --max-ms, fails when the library import
+regresses past a budget.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--max-ms MS] [--json PATH]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.corpus import build_keybox, build_playready, build_widevine
+
+SCENARIOS = [
+    ("import main", "import main", None),
+    ("parse .wvd", "import main; main.read_device_file({path!r})", ("device.wvd", build_widevine)),
+    ("parse .prd", "import main; main.read_device_file({path!r})", ("device.prd", build_playready)),
+    ("parse keybox", "import main; main.read_device_file({path!r})", ("device.keybox", build_keybox)),
+]
+
+
+def import_times(code):
+    """Returns {module: cumulative_us} for the top-level imports of one fresh interpreter."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, raw_name = line[len("import time:"):].split("|")
+        # Nested imports are indented by two extra spaces per level
+        if not raw_name.startswith("   "):
+            times[raw_name.strip()] = int(cumulative)
+    return times
+
+
+def run_scenario(code, runs, baseline):
+    """Median import time of the modules a scenario adds on top of a bare interpreter."""
+    totals, modules = [], {}
+    for _ in range(runs):
+        times = {name: value for name, value in import_times(code).items() if name not in baseline}
+        totals.append(sum(times.values()))
+        for name, value in times.items():
+            modules.setdefault(name, []).append(value)
+    heaviest = sorted(((statistics.median(values), name) for name, values in modules.items()), reverse=True)[:5]
+    return statistics.median(totals) / 1000, [(name, value / 1000) for value, name in heaviest]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if 'import main' takes longer than this")
+    parser.add_argument("--json", metavar="PATH", default=None, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    baseline = set(import_times("pass"))
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, template, sample in SCENARIOS:
+            path = None
+            if sample:
+                path = os.path.join(directory, sample[0])
+                with open(path, "wb") as file:
+                    file.write(sample[1]())
+            total_ms, heaviest = run_scenario(template.format(path=path), args.runs, baseline)
+            results[name] = {"import_ms": total_ms, "heaviest": dict(heaviest)}
+            print(f"{name:<14} {total_ms:8.1f} ms   " + ", ".join(f"{module} {ms:.1f}" for module, ms in heaviest))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.max_ms is not None and results["import main"]["import_ms"] > args.max_ms:
+        print(f"'import main' took {results['import main']['import_ms']:.1f} ms, budget is {args.max_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
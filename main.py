@@ -1,169 +1,335 @@
 import os
+import sys
+import time
+import atexit
+import argparse
+from functools import partial
 from colorama import init, Fore, Style
-from modules.logger import setup_logging
+from modules.logger import get_logger, setup_logging
 from modules.banners import banners, clear_terminal
-from modules.utils import convert_bytes_to_base64
-from modules.keybox import parse_keybox, keybox_main
-from modules.widevine import WidevineDeviceStruct
-from modules.playready import PlayReadyDeviceStruct
-
-init(autoreset=True)
-logging = setup_logging()
-
-def read_device_file(file_path):
-    """Reads and parses a DRM device file (PlayReady or Widevine)."""
-    file_extension = os.path.splitext(file_path)[1].lower()
-    parsed_data, device_type = None, None
-
-    if file_extension in [".prd", ".dat", ".bin"]:
-        device_type = "PlayReady"
-        structs = [
-            ("Version 3", PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_3),
-            ("Version 2", PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_2),
-            ("Version 1", PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_1),
-        ]
-
-        try:
-            hex_result = PlayReadyDeviceStruct.read_hex(file_path)
-            device_name = hex_result.get("device_name", "Unknown Device") if hex_result else "Unknown Device"
-            security_level = hex_result.get("security_level", "Unknown Security Level") if hex_result else "Unknown Security Level"
-        except Exception as e:
-            logging.warning(f"read_hex() failed: {e}. Using default values.")
-            device_name, security_level = "Unknown Device", "Unknown Security Level"
-
-        try:
-            with open(file_path, "rb") as file:
-                file_data = file.read()
-
-            for version_name, struct in structs:
-                try:
-                    parsed_data = struct.parse(file_data)
-                    parsed_data["device_name"] = device_name
-                    parsed_data["security_level"] = security_level
-
-                    return parsed_data, device_type
-                except Exception as e:
-                    logging.warning(f"Error parsing PlayReady file with {version_name}: {e}")
-
-        except Exception as e:
-            logging.error(f"Failed to read file: {e}")
-
-    elif file_extension == ".wvd":
-        device_type = "Widevine"
-        structs = [
-            ("Version 2", WidevineDeviceStruct.WidevineDeviceStructVersion_2),
-            ("Version 1", WidevineDeviceStruct.WidevineDeviceStructVersion_1),
-        ]
-
-        try:
-            with open(file_path, "rb") as file:
-                file_data = file.read()
-
-            for version_name, struct in structs:
-                try:
-                    parsed_data = struct.parse(file_data)
-                    return parsed_data, device_type
-                except Exception as e:
-                    logging.warning(f"Error parsing Widevine file with {version_name}: {e}")
+from modules.utils import read_buffer
+from modules.detector import type_from_extension
+from modules.api import parse_device_buffer
+from modules import stats
+from modules.stats import stage
+from modules.indexer import DirectoryIndex, watch
+from modules.archive import is_archive
+from modules.render import TerminalRenderer, get_renderer, parse_blob_mode
+from modules.clientid import client_id_info
+from modules.picker import Picker, load_entries
+
+logging = get_logger()
+
+def read_device_file(file_path, detect=True, cache=None):
+    """Reads and parses a DRM device file (PlayReady or Widevine).
+
+    The file is read exactly once; every stage works on slices of that buffer.
+    With a ParseCache the normalized result is served from the cache when possible.
+    """
+    try:
+        with stage("read_device_file"):
+            if cache is not None:
+                with stage("cache.get_or_parse"):
+                    return cache.get_or_parse(file_path, lambda buffer: parse_device_buffer(buffer, file_path, detect=detect))
+            with read_buffer(file_path) as buffer:
+                return parse_device_buffer(buffer, file_path, detect=detect)
+    except OSError as e:
+        logging.error(f"Failed to read file: {e}")
+        return None, type_from_extension(file_path)
+
+def pretty_print(data, device_type, renderer=None):
+    """Prints parsed data in a structured format."""
+    with stage("render"):
+        (renderer or TerminalRenderer()).write(data, device_type)
+
+def batch_main(directory_path, workers=None, cache=None, index_path=None, watch_interval=None, renderer=None,
+               decode_client_id=False, async_reads=None):
+    """Parses every new or changed file below a directory without prompting and prints a run summary.
+
+    With ``watch_interval`` the directory is polled afterwards and only changes are parsed.
+    With a ``renderer`` every parsed record is written through it as well.
+    ``directory_path`` may also be a zip/tar archive, whose members are parsed in one pass.
+    """
+    if os.path.isfile(directory_path) and is_archive(directory_path):
+        return run_batch_pass([directory_path], workers, None, renderer, decode_client_id)
+
+    if not os.path.isdir(directory_path):
+        print(f"{Fore.RED}Directory '{directory_path}' does not exist. Exiting...{Style.RESET_ALL}")
+        exit(1)
 
-        except Exception as e:
-            logging.error(f"Failed to read file: {e}")
+    index = DirectoryIndex(directory_path, index_path)
+    changes = index.refresh()
+    summary = run_batch_pass(changes.added + changes.changed, workers, cache, renderer, decode_client_id, async_reads)
+    index.commit(changes, [file_path for file_path, _ in summary.failures])
 
-    elif file_extension in [".enc", ".keybox", ".bin"]:
-        device_type = "Widevine Keybox"
+    if watch_interval:
+        print(f"{Fore.CYAN}Watching '{directory_path}' every {watch_interval:g}s (Ctrl+C to stop)...{Style.RESET_ALL}")
         try:
-            parsed_keybox, base64_keybox, device_id_analysis, crc_valid, crc_with_magic, decrypted_metadata, metadata_analysis = parse_keybox(file_path)
-
-            return {
-                "parsed_keybox": parsed_keybox,
-                "base64_keybox": base64_keybox,
-                "device_id_analysis": device_id_analysis,
-                "crc_valid": crc_valid,
-                "crc_with_magic": crc_with_magic,
-                "decrypted_metadata": decrypted_metadata,
-                "metadata_analysis": metadata_analysis
-            }, device_type
-        except Exception as e:
-            logging.error(f"Error parsing Widevine Keybox file: {e}")
-            return None, device_type
-        
-    elif ".xml" in file_extension:
-        device_type = "Widevine Keybox XML"
-        try:
-            result = keybox_main(file_path)
-            return result, device_type
-        except Exception as e:
-            logging.error(f"Error processing Widevine Keybox XML file: {e}")
-            return {"Status": "Error"}, device_type
-
-def process_directory(directory_path):
-    """Finds all devices in the specified directory."""
-    devices = []
-    for filename in os.listdir(directory_path):
-        file_path = os.path.join(directory_path, filename)
-        if os.path.isfile(file_path):
-            devices.append((filename, file_path))
-    return devices
-
-def choose_device(devices):
-    """Displays available devices with a structured UI and allows user selection."""
-    if not devices:
-        print(f"\n{Fore.RED}No devices found to process.{Style.RESET_ALL}")
+            for changes in watch(index, watch_interval):
+                for file_path in changes.removed:
+                    print(f"{Fore.YELLOW}[REMOVED]{Style.RESET_ALL} {file_path}")
+                failed = []
+                if changes.added or changes.changed:
+                    summary = run_batch_pass(changes.added + changes.changed, workers, cache, renderer, decode_client_id, async_reads)
+                    failed = [file_path for file_path, _ in summary.failures]
+                index.commit(changes, failed)
+        except KeyboardInterrupt:
+            pass
+
+    return summary
+
+def run_batch_pass(file_paths, workers=None, cache=None, renderer=None, decode_client_id=False, async_reads=None):
+    """Parses the given files on the process pool, streaming one line per file and a summary.
+
+    With ``async_reads`` the files are read concurrently by the asyncio pipeline and only
+    the parsing happens on the pool. Archives are read member by member in the parent
+    and their buffers are parsed on the pool.
+
+    NDJSON and CSV records go to stdout, so the status lines move to stderr to keep the output parseable.
+    """
+    from itertools import chain
+    from modules.archive import archive_tasks
+    from modules.batch import BatchSummary, initialize_worker, run_batch, run_tasks
+    from modules.logger import worker_log_queue
+
+    parse_func = partial(read_device_file, cache=cache) if cache else read_device_file
+    cache_before = cache.stats() if cache else None
+
+    status = sys.stderr if renderer is not None and not isinstance(renderer, TerminalRenderer) else sys.stdout
+    summary = BatchSummary()
+    worker_settings = (worker_log_queue(), logging.getEffectiveLevel(), stats.is_enabled(), stats.tracing_memory())
+    archives = [file_path for file_path in file_paths if is_archive(file_path)]
+    file_paths = [file_path for file_path in file_paths if not is_archive(file_path)]
+    if async_reads:
+        from modules.pipeline import run_pipeline
+        results = run_pipeline(file_paths, parse_device_buffer, workers=workers, summary=summary,
+                               initializer=initialize_worker, initargs=worker_settings, max_reads=async_reads)
+    else:
+        results = run_batch(file_paths, parse_func, workers=workers, summary=summary,
+                            initializer=initialize_worker, initargs=worker_settings)
+    if archives:
+        results = chain(results, run_tasks(archive_tasks(archives, parse_device_buffer), workers=workers, summary=summary,
+                                           initializer=initialize_worker, initargs=worker_settings))
+    for result in results:
+        if result.stats:
+            stats.merge(result.stats)
+        elapsed_ms = result.elapsed * 1000
+        if result.error is None:
+            if renderer is not None:
+                if decode_client_id:
+                    client_id_info(result.data, result.device_type)
+                with stage("render"):
+                    renderer.write(result.data, result.device_type, result.file_path)
+            print(f"{Fore.GREEN}[OK]{Style.RESET_ALL} {result.file_path} ({result.device_type}) {elapsed_ms:.1f} ms", file=status)
+        else:
+            print(f"{Fore.RED}[FAILED]{Style.RESET_ALL} {result.file_path}: {result.error}", file=status)
+    if renderer is not None:
+        renderer.close()
+
+    print(Fore.CYAN + "═" * 70 + Style.RESET_ALL, file=status)
+    print(f"{Fore.MAGENTA}{'Files':<30}:{Style.RESET_ALL} {summary.total:,}", file=status)
+    print(f"{Fore.MAGENTA}{'Parsed':<30}:{Style.RESET_ALL} {Fore.GREEN}{summary.parsed:,}{Style.RESET_ALL}", file=status)
+    print(f"{Fore.MAGENTA}{'Failed':<30}:{Style.RESET_ALL} {Fore.RED}{len(summary.failures):,}{Style.RESET_ALL}", file=status)
+    print(f"{Fore.MAGENTA}{'Elapsed':<30}:{Style.RESET_ALL} {summary.elapsed:.2f} s", file=status)
+    print(f"{Fore.MAGENTA}{'Throughput':<30}:{Style.RESET_ALL} {summary.files_per_second:,.1f} files/s", file=status)
+    if cache:
+        cache_after = cache.stats()
+        hits = cache_after["total_hits"] - cache_before["total_hits"]
+        misses = cache_after["total_misses"] - cache_before["total_misses"]
+        print(f"{Fore.MAGENTA}{'Cache Hits / Misses':<30}:{Style.RESET_ALL} {hits:,} / {misses:,}", file=status)
+        print(f"{Fore.MAGENTA}{'Cache Entries':<30}:{Style.RESET_ALL} {cache_after['entries']:,} ({cache_after['size']:,} bytes)", file=status)
+    print(Fore.CYAN + "═" * 70 + Style.RESET_ALL + "\n", file=status)
+
+    return summary
+
+def duplicates_main(directory_path, index_path, shared_with=None):
+    """Updates the component index for a directory and reports identical files and shared components."""
+    from modules.components import ComponentIndex
+
+    if not os.path.exists(directory_path):
+        print(f"{Fore.RED}Directory '{directory_path}' does not exist. Exiting...{Style.RESET_ALL}")
         exit(1)
 
-    box_width = 64  # Ensures consistent width
-    title = " Available Device Files "
-    title_bar = f"╔{'═' * (box_width - 2)}╗"
-    title_text = f"║{title.center(box_width - 2)}║"
-    separator = f"╠{'═' * (box_width - 2)}╣"
-    bottom_border = f"╚{'═' * (box_width - 2)}╝"
-
-    print(f"\n{Fore.CYAN}{title_bar}{Fore.RESET}")
-    print(f"{title_text}")
-    print(f"{separator}")
-
-    for idx, (filename, _) in enumerate(devices, 1):
-        file_display = filename[:50] + "..." if len(filename) > 50 else filename
-        print(f"║ {Fore.YELLOW}{idx:<2} . {Fore.GREEN}{file_display:<55}{Fore.CYAN} ║{Fore.RESET}")
+    with ComponentIndex(index_path) as index:
+        update = index.update(directory_path, parse_device_buffer)
+        print(f"{Fore.MAGENTA}{'Hashed / Unchanged / Removed':<30}:{Style.RESET_ALL} {update.hashed:,} / {update.unchanged:,} / {update.removed:,}")
+
+        if shared_with:
+            print(Fore.CYAN + "═" * 70 + Style.RESET_ALL)
+            print(f"{Fore.YELLOW}Files sharing data with {shared_with}{Style.RESET_ALL}")
+            for field, paths in index.shared_with(shared_with).items():
+                print(f"{Fore.MAGENTA}{field.replace('_', ' ').title():<30}:{Style.RESET_ALL} {len(paths):,} files")
+                for path in paths:
+                    print(f"    {path}")
+            print(Fore.CYAN + "═" * 70 + Style.RESET_ALL + "\n")
+            return
+
+        print(Fore.CYAN + "═" * 70 + Style.RESET_ALL)
+        print(f"{Fore.YELLOW}Identical files{Style.RESET_ALL}")
+        for digest, paths in index.duplicates():
+            print(f"{Fore.MAGENTA}{digest[:16]:<30}:{Style.RESET_ALL} {len(paths):,} files")
+            for path in paths:
+                print(f"    {path}")
+
+        print(Fore.CYAN + "═" * 70 + Style.RESET_ALL)
+        print(f"{Fore.YELLOW}Shared components{Style.RESET_ALL}")
+        for field, digest, size, paths in index.shared_components():
+            label = f"{field} {digest[:12]}"
+            print(f"{Fore.MAGENTA}{label:<30}:{Style.RESET_ALL} {len(paths):,} files ({size:,} bytes)")
+            for path in paths:
+                print(f"    {path}")
+        print(Fore.CYAN + "═" * 70 + Style.RESET_ALL + "\n")
+
+def keyboxes_main(file_path, renderer=None, decrypt=False):
+    """Validates every record of a container of concatenated keyboxes and prints a summary.
+
+    With a ``renderer`` every keybox is also written through it as one row.
+    """
+    from modules.keybox import parse_keybox_container
+
+    if not os.path.isfile(file_path):
+        print(f"{Fore.RED}File '{file_path}' does not exist. Exiting...{Style.RESET_ALL}")
+        exit(1)
 
-    print(bottom_border + Style.RESET_ALL)
+    started = time.perf_counter()
+    table = parse_keybox_container(file_path)
+    elapsed = time.perf_counter() - started
+    invalid = table.invalid()
+
+    status = sys.stderr if renderer is not None and not isinstance(renderer, TerminalRenderer) else sys.stdout
+    if renderer is not None:
+        with stage("render"):
+            for row in table.rows(decrypt):
+                renderer.write(row, "Widevine Keybox", file_path)
+        renderer.close()
+
+    bad_magic = table.count - sum(table.magic_valid)
+    print(Fore.CYAN + "═" * 70 + Style.RESET_ALL, file=status)
+    print(f"{Fore.MAGENTA}{'Keyboxes':<30}:{Style.RESET_ALL} {table.count:,}", file=status)
+    print(f"{Fore.MAGENTA}{'Valid':<30}:{Style.RESET_ALL} {table.count - len(invalid):,}", file=status)
+    print(f"{Fore.MAGENTA}{'Bad Magic / CRC Mismatch':<30}:{Style.RESET_ALL} {bad_magic:,} / "
+          f"{sum(not table.crc_valid(index) for index in invalid):,}", file=status)
+    if table.trailing_bytes:
+        print(f"{Fore.MAGENTA}{'Trailing Bytes':<30}:{Style.RESET_ALL} {table.trailing_bytes:,}", file=status)
+    print(f"{Fore.MAGENTA}{'Throughput':<30}:{Style.RESET_ALL} {table.count / elapsed if elapsed > 0 else 0:,.0f} keyboxes/s", file=status)
+    if invalid:
+        shown = ", ".join(str(index) for index in invalid[:20])
+        print(f"{Fore.RED}{'Invalid Records':<30}:{Style.RESET_ALL} {shown}{' ...' if len(invalid) > 20 else ''}", file=status)
+    print(Fore.CYAN + "═" * 70 + Style.RESET_ALL + "\n", file=status)
+    return table
+
+def print_stats(json_path=None):
+    """Prints the per-stage statistics table and optionally writes it as JSON."""
+    rows = stats.report()
+    if json_path:
+        stats.dump(json_path)
+    if not rows:
+        return
 
-    while True:
+    show_memory = rows[0]["peak_bytes"] is not None
+    print(Fore.CYAN + "═" * 70 + Style.RESET_ALL)
+    header = f"{'Stage':<26}{'Calls':>9}{'Failed':>8}{'Total ms':>11}{'Mean us':>10}"
+    if show_memory:
+        header += f"{'Peak KB':>10}"
+    print(f"{Fore.MAGENTA}{header}{Style.RESET_ALL}")
+    for row in rows:
+        line = f"{row['stage']:<26}{row['calls']:>9,}{row['failures']:>8,}{row['total_ms']:>11.2f}{row['mean_us']:>10.1f}"
+        if show_memory:
+            line += f"{row['peak_bytes'] / 1024:>10.1f}"
+        print(line)
+    print(Fore.CYAN + "═" * 70 + Style.RESET_ALL)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Parse PlayReady & Widevine device files.")
+    parser.add_argument("--batch", metavar="DIR", nargs="?", const="devices",
+                        help="parse every file below DIR (default: devices), including zip/tar archives, without prompting; DIR may also be an archive")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes for --batch (default: CPU count)")
+    parser.add_argument("--async-reads", metavar="N", type=int, default=None,
+                        help="with --batch, keep up to N file reads in flight with asyncio (for network storage; not combined with --cache)")
+    parser.add_argument("--cache", metavar="PATH", default=None,
+                        help="persistent parse cache database (disabled by default)")
+    parser.add_argument("--cache-size", metavar="MB", type=int, default=256,
+                        help="maximum cache size in MB before least recently used entries are evicted (default: 256)")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="drop every cached result before running")
+    parser.add_argument("--log-level", default="DEBUG", type=str.upper,
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                        help="minimum level written to the console and logs/debug.log (default: DEBUG)")
+    parser.add_argument("--stats", action="store_true",
+                        help="time every parse stage and print a summary at the end")
+    parser.add_argument("--stats-json", metavar="PATH", default=None,
+                        help="write the stage statistics as JSON (implies --stats)")
+    parser.add_argument("--stats-memory", action="store_true",
+                        help="also record tracemalloc peaks per stage (slower; implies --stats)")
+    parser.add_argument("--index", metavar="PATH", default=None,
+                        help="persist the directory snapshot so --batch only parses files added or changed since the last run")
+    parser.add_argument("--watch", metavar="SECONDS", type=float, nargs="?", const=5.0, default=None,
+                        help="after --batch, keep polling the directory and parse changes (default interval: 5s)")
+    parser.add_argument("--duplicates", metavar="DIR", nargs="?", const="devices",
+                        help="index DIR (default: devices) and list identical files and shared certificates/client IDs")
+    parser.add_argument("--components-db", metavar="PATH", default=".cache/components.db",
+                        help="component index database used by --duplicates (default: .cache/components.db)")
+    parser.add_argument("--shared-with", metavar="FILE", default=None,
+                        help="with --duplicates, list only the files sharing content or components with FILE")
+    parser.add_argument("--client-id", action="store_true",
+                        help="decode the Widevine client ID (token type, client info such as company/model, capabilities)")
+    parser.add_argument("--format", choices=["terminal", "ndjson", "csv"], default=None,
+                        help="output format for parsed records (default: terminal; --batch prints only status lines unless set)")
+    parser.add_argument("--blobs", metavar="MODE", type=parse_blob_mode, default=("full", 0),
+                        help="binary fields as full base64, or blobs over BYTES (default 64) as a 'truncate[:BYTES]' prefix or a 'hash[:BYTES]' SHA-256 digest")
+    parser.add_argument("--keyboxes", metavar="FILE", default=None,
+                        help="validate a container of concatenated 128-byte keyboxes (magic and CRC of every record); with --format, one row per keybox")
+    parser.add_argument("--decrypt-metadata", action="store_true",
+                        help="with --keyboxes and --format, add each keybox's decrypted device ID metadata")
+    parser.add_argument("--serve", metavar="SOCKET", default=None,
+                        help="run a local daemon on the Unix socket SOCKET, keeping parsers and caches loaded (see modules/daemon.py)")
+    args = parser.parse_args(argv)
+    if args.async_reads and args.cache:
+        parser.error("--async-reads cannot be combined with --cache")
+    return args
+
+def main(argv=None):
+    """Automatically displays available devices and allows user to choose which one to parse."""
+    args = parse_args(argv)
+    init(autoreset=True)
+    setup_logging(level=args.log_level)
+    if args.stats or args.stats_json or args.stats_memory:
+        stats.enable(trace_memory=args.stats_memory)
+        atexit.register(print_stats, args.stats_json)
+
+    cache = None
+    if args.cache:
+        from modules.cache import ParseCache
+        cache = ParseCache(args.cache, max_bytes=args.cache_size * 1024 * 1024)
+    if cache and args.clear_cache:
+        cache.invalidate()
+
+    renderer = get_renderer(args.format, blob_mode=args.blobs) if args.format else None
+
+    if args.serve:
+        from modules.daemon import serve
         try:
-            choice = int(input(f"\n{Fore.CYAN}Enter the number of the device you want to view (1-{len(devices)}): {Style.RESET_ALL}"))
-            if 1 <= choice <= len(devices):
-                return devices[choice - 1]
-            else:
-                print(f"{Fore.RED}Invalid choice. Please enter a number between 1 and {len(devices)}.{Style.RESET_ALL}")
-        except ValueError:
-            print(f"{Fore.RED}Invalid input. Please enter a valid number.{Style.RESET_ALL}")
-
-def pretty_print(data, device_type):
-    """Prints parsed data in a structured format."""
-    if not data:
-        print(f"{Fore.RED}Failed to parse {device_type} file.{Style.RESET_ALL}")
+            serve(args.serve)
+        except OSError as e:
+            print(f"{Fore.RED}Cannot serve on {args.serve}: {e}{Style.RESET_ALL}")
+            exit(1)
         return
 
-    print(f"\n{Fore.CYAN}╔════════════════════════════════════════════════════════════════════╗{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}                      {Fore.YELLOW}Parsed {device_type} Data                  {Fore.CYAN} {Style.RESET_ALL}")
-    print(f"{Fore.CYAN}╚════════════════════════════════════════════════════════════════════╝{Style.RESET_ALL}")
+    if args.keyboxes:
+        table = keyboxes_main(args.keyboxes, renderer, decrypt=args.decrypt_metadata)
+        exit(1 if table.invalid() else 0)
 
-    for field, value in data.items():
-        if isinstance(value, bytes):
-            value = convert_bytes_to_base64(value)
-        elif isinstance(value, int):
-            value = f"{value:,}"
-        elif isinstance(value, bool):
-            value = f"{Fore.GREEN}Enabled{Style.RESET_ALL}" if value else f"{Fore.RED}Disabled{Style.RESET_ALL}"
-        elif value is None:
-            value = f"{Fore.YELLOW}N/A{Style.RESET_ALL}"
-
-        print(f"{Fore.MAGENTA}{field.replace('_', ' ').title():<30}:{Style.RESET_ALL} {Fore.WHITE}{value}{Style.RESET_ALL}")
+    if args.duplicates:
+        duplicates_main(args.duplicates, args.components_db, args.shared_with)
+        return
 
-    print(Fore.CYAN + "═" * 70 + Style.RESET_ALL + "\n")
+    if args.batch:
+        summary = batch_main(args.batch, workers=args.workers, cache=cache,
+                             index_path=args.index, watch_interval=args.watch, renderer=renderer,
+                             decode_client_id=args.client_id, async_reads=args.async_reads)
+        exit(1 if summary.failures else 0)
 
-def main():
-    """Automatically displays available devices and allows user to choose which one to parse."""
     clear_terminal()
     banners()
     devices_directory = "devices"
@@ -172,20 +338,29 @@ def main():
         print(f"{Fore.RED}Directory 'devices' does not exist. Exiting...{Style.RESET_ALL}")
         exit(1)
 
-    devices = process_directory(devices_directory)
+    entries = load_entries(devices_directory)
 
-    if not devices:
+    if not entries:
         print(f"{Fore.RED}No devices found to process.{Style.RESET_ALL}")
         exit(1)
 
-    selected_device = choose_device(devices)
-    filename, file_path = selected_device
-    clear_terminal()
-    banners()
-    print(f"{Fore.CYAN}Processing file: {filename}{Style.RESET_ALL}")
+    def redraw():
+        clear_terminal()
+        banners()
 
-    parsed_data, device_type = read_device_file(file_path)
-    pretty_print(parsed_data, device_type)
+    # The picker parses the listed files in the background, so the chosen one is usually done already
+    selection = Picker(entries, partial(read_device_file, cache=cache), clear=redraw).run()
+    if selection is None:
+        return
+    entry, (parsed_data, device_type) = selection
+    redraw()
+    print(f"{Fore.CYAN}Processing file: {entry.name}{Style.RESET_ALL}")
+
+    if args.client_id:
+        client_id_info(parsed_data, device_type)
+    renderer = renderer or get_renderer(blob_mode=args.blobs)
+    pretty_print(parsed_data, device_type, renderer)
+    renderer.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,92 @@
+import logging as _logging
+from collections import namedtuple
+from modules.detector import EXTENSION_TYPES, HEADER_SIZE, detect_format, type_from_extension
+from modules.logger import get_logger
+from modules.registry import FORMAT_HANDLERS, get_handler
+from modules.stats import stage
+from modules.utils import normalize_result, read_buffer
+
+logging = get_logger()
+
+# Library use stays silent until setup_logging() attaches real handlers
+if not logging.handlers:
+    logging.addHandler(_logging.NullHandler())
+
+
+class ParseResult(namedtuple("ParseResult", ["path", "device_type", "version", "data", "error"])):
+    """Outcome of parse_bytes()/parse_path(); ``data`` holds plain dicts/bytes, ``error`` a message or None."""
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def parse_device_buffer(buffer, file_path="", detect=True):
+    """Parses an in-memory device file.
+
+    The format is detected from the magic bytes so each file goes straight to its
+    versioned struct; the extension of ``file_path`` and trial parsing are only used
+    as a fallback. The parser for each format is imported on first use.
+    """
+    data, device_type, _ = _parse_buffer(buffer, file_path, detect)
+    return data, device_type
+
+
+def _parse_buffer(buffer, file_path="", detect=True, device_type=None):
+    buffer = memoryview(buffer)
+    version = None
+    with stage("detect"):
+        if device_type is None:
+            device_type, version = detect_format(buffer[:HEADER_SIZE], len(buffer)) if detect else (None, None)
+        if device_type is None:
+            device_type = type_from_extension(file_path)
+
+    handler = get_handler(device_type)
+    if handler is None:
+        return None, None, None
+
+    return handler(buffer, version), device_type, version
+
+
+def _result(path, parse):
+    try:
+        data, device_type, version = parse()
+    except Exception as e:
+        return ParseResult(path, type_from_extension(path or ""), None, None, f"{type(e).__name__}: {e}")
+
+    if device_type is None:
+        return ParseResult(path, None, None, None, "Unsupported file type")
+    if not data:
+        return ParseResult(path, device_type, version, None, f"Failed to parse {device_type} file")
+    return ParseResult(path, device_type, version, data, None)
+
+
+def _parse_normalized(buffer, file_path="", device_type=None):
+    data, device_type, version = _parse_buffer(buffer, file_path, device_type=device_type)
+    # Copies every slice out of the buffer, so results outlive memory-mapped files
+    return normalize_result(data), device_type, version
+
+
+def parse_bytes(data, hint=None):
+    """Parses a device file held in memory, without printing anything.
+
+    ``hint`` is either a device type (e.g. "Widevine") that skips detection, or a file
+    name/extension used when the magic bytes aren't recognised. Errors are returned in
+    the result instead of raised.
+    """
+    device_type = hint if hint in FORMAT_HANDLERS else None
+    file_path = "" if device_type or not hint else hint
+    if file_path in EXTENSION_TYPES:
+        file_path = "file" + file_path
+    return _result(None, lambda: _parse_normalized(data, file_path, device_type))
+
+
+def parse_path(path):
+    """parse_bytes() for a file on disk; a file that cannot be read becomes an error result."""
+    def parse():
+        with read_buffer(path) as buffer:
+            return _parse_normalized(buffer, path)
+
+    return _result(path, parse)
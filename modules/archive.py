@@ -0,0 +1,117 @@
+import os
+import tarfile
+import zipfile
+import zlib
+from functools import partial
+from modules.detector import EXTENSION_TYPES, HEADER_SIZE, detect_format
+from modules.logger import get_logger
+
+logging = get_logger()
+
+try:
+    from lzma import LZMAError
+except ImportError:  # Python built without lzma; tarfile then can't open .xz either
+    LZMAError = OSError
+
+# What reading a damaged, encrypted (RuntimeError) or unsupported (NotImplementedError)
+# archive or member can raise; bz2 reports corrupt data as OSError
+ARCHIVE_ERRORS = (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, zlib.error, LZMAError,
+                  RuntimeError, NotImplementedError)
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+MAX_MEMBER_SIZE = 64 * 1024 * 1024  # device files are kilobytes; anything this large is not one
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def wanted(name, header, size):
+    """Same rules as for files on disk: a known extension or recognizable magic bytes."""
+    if os.path.splitext(name)[1].lower() in EXTENSION_TYPES:
+        return True
+    return detect_format(header, size)[0] is not None
+
+
+def read_member(name, stream, size, max_member_size):
+    """Reads one member if it looks like a device file; returns None otherwise."""
+    if size > max_member_size:
+        logging.warning(f"Skipping archive member {name}: {size:,} bytes exceeds the {max_member_size:,} byte limit")
+        return None
+    header = stream.read(HEADER_SIZE)
+    if not wanted(name, memoryview(header), size):
+        return None
+    return header + stream.read(size - len(header))
+
+
+def iter_archive(archive_path, max_member_size=MAX_MEMBER_SIZE, on_error=None):
+    """Yields ``(member_name, data)`` for every device file in a zip or tar archive.
+
+    Members are read one at a time straight from the archive, and only after their
+    header passed the extension/magic filter. Tar archives (optionally gz/bz2/xz
+    compressed) are opened as a stream, so the whole archive is one sequential pass.
+
+    With ``on_error(member_name, error)`` a member that cannot be read is reported and
+    skipped; otherwise the error is raised. In a tar stream the next member then usually
+    fails too, which ends the archive with an error.
+    """
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                try:
+                    with archive.open(info) as stream:
+                        data = read_member(info.filename, stream, info.file_size, max_member_size)
+                except ARCHIVE_ERRORS as e:
+                    if on_error is None:
+                        raise
+                    on_error(info.filename, e)
+                    continue
+                if data is not None:
+                    yield info.filename, data
+        return
+
+    with tarfile.open(archive_path, mode="r|*") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            try:
+                data = read_member(member.name, archive.extractfile(member), member.size, max_member_size)
+            except ARCHIVE_ERRORS as e:
+                if on_error is None:
+                    raise
+                on_error(member.name, e)
+                continue
+            if data is not None:
+                yield member.name, data
+
+
+def _archive_error(error, file_path):
+    raise error
+
+
+def archive_tasks(archive_paths, parse_buffer):
+    """``(parse_func, member_path)`` pairs for modules.batch.run_tasks, one per device file in each archive.
+
+    A member that cannot be read becomes a failed task and the rest of the archive is
+    still read; an archive that cannot be opened becomes a single failed task.
+    """
+    for archive_path in archive_paths:
+        failed = []
+
+        def member_error(name, error):
+            logging.error(f"Failed to read {name} in archive {archive_path}: {type(error).__name__}: {error}")
+            failed.append((error, os.path.join(archive_path, name)))
+
+        try:
+            for name, data in iter_archive(archive_path, on_error=member_error):
+                while failed:
+                    error, member_path = failed.pop(0)
+                    yield partial(_archive_error, error), member_path
+                yield partial(parse_buffer, data), os.path.join(archive_path, name)
+        except ARCHIVE_ERRORS as e:
+            logging.error(f"Failed to read archive {archive_path}: {type(e).__name__}: {e}")
+            failed.append((e, archive_path))
+        for error, member_path in failed:
+            yield partial(_archive_error, error), member_path
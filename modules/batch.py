@@ -0,0 +1,116 @@
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from modules import stats
+from modules.utils import normalize_result
+
+BatchResult = namedtuple("BatchResult", ["file_path", "device_type", "data", "error", "elapsed", "stats"], defaults=(None,))
+
+
+class BatchSummary:
+    """Collects throughput and failure counts for a batch run."""
+
+    def __init__(self):
+        self.total = 0
+        self.parsed = 0
+        self.failures = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add(self, result):
+        self.total += 1
+        if result.error is None:
+            self.parsed += 1
+        else:
+            self.failures.append((result.file_path, result.error))
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def files_per_second(self):
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def initialize_worker(log_queue, log_level, stats_enabled=False, trace_memory=False):
+    """Process-pool initializer: wires up logging and stage statistics in each worker."""
+    from modules.logger import configure_worker
+
+    configure_worker(log_queue, log_level)
+    if stats_enabled:
+        stats.enable(trace_memory=trace_memory)
+    else:
+        stats.disable()
+
+
+def _parse_worker(parse_func, file_path):
+    """Runs one parse inside a worker process and reports errors instead of raising them.
+
+    With stage statistics enabled, the worker's counters since the previous file travel
+    back with the result so the parent can merge them.
+    """
+    result = _run_parse(parse_func, file_path)
+    if stats.is_enabled():
+        result = result._replace(stats=stats.collect())
+    return result
+
+
+def _run_parse(parse_func, file_path):
+    started = time.perf_counter()
+    try:
+        data, device_type = parse_func(file_path) or (None, None)
+        if device_type is None:
+            return BatchResult(file_path, None, None, "Unsupported file type", time.perf_counter() - started)
+
+        if not data:
+            return BatchResult(file_path, device_type, None, f"Failed to parse {device_type} file", time.perf_counter() - started)
+
+        return BatchResult(file_path, device_type, normalize_result(data), None, time.perf_counter() - started)
+    except Exception as e:
+        return BatchResult(file_path, None, None, f"{type(e).__name__}: {e}", time.perf_counter() - started)
+
+
+def run_batch(file_paths, parse_func, workers=None, summary=None, initializer=None, initargs=()):
+    """Parses files on a process pool, yielding one BatchResult per file as it finishes.
+
+    At most ``workers * 4`` files are in flight at a time so that huge inventories
+    don't queue every path up front. ``initializer``/``initargs`` run once per worker
+    (e.g. modules.logger.configure_worker).
+    """
+    return run_tasks(((parse_func, file_path) for file_path in file_paths), workers, summary, initializer, initargs)
+
+
+def run_tasks(tasks, workers=None, summary=None, initializer=None, initargs=()):
+    """run_batch() for ``(parse_func, file_path)`` pairs, e.g. buffers read from an archive.
+
+    ``tasks`` is consumed lazily, one item per free slot.
+    """
+    workers = workers or os.cpu_count() or 1
+    summary = summary if summary is not None else BatchSummary()
+    max_pending = workers * 4
+    tasks = iter(tasks)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        pending = set()
+        for parse_func, file_path in tasks:
+            pending.add(executor.submit(_parse_worker, parse_func, file_path))
+            if len(pending) >= max_pending:
+                break
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                summary.add(result)
+                yield result
+
+                next_task = next(tasks, None)
+                if next_task is not None:
+                    pending.add(executor.submit(_parse_worker, *next_task))
+
+    summary.finish()
@@ -0,0 +1,109 @@
+import hashlib
+import struct
+import threading
+from modules.logger import get_logger
+
+logging = get_logger()
+
+# PlayReady binary certificates (BCert): a "CHAI" chain header followed by "CERT"
+# certificates, each made of typed objects. All integers are big-endian.
+CHAIN_HEADER = struct.Struct(">4sIIII")  # signature, version, total_length, flags, certificate_count
+CERT_HEADER = struct.Struct(">4sIII")  # signature, version, total_length, certificate_length
+OBJECT_HEADER = struct.Struct(">HHI")  # flags, type, length (header included)
+UINT32 = struct.Struct(">I")
+
+BASIC_INFO = 0x0001
+MANUFACTURER_INFO = 0x0007
+BASIC_INFO_SECURITY_LEVEL = 16  # after the 16-byte certificate ID
+
+
+def iter_certificates(chain):
+    """Yields each certificate of a CHAI chain (or a lone CERT) as a memoryview."""
+    data = memoryview(chain)
+    signature = bytes(data[:4])
+    if signature == b"CHAI":
+        _, _, _, _, count = CHAIN_HEADER.unpack_from(data)
+        offset = CHAIN_HEADER.size
+    elif signature == b"CERT":
+        count, offset = 1, 0
+    else:
+        raise ValueError(f"Not a certificate chain: {signature!r}")
+
+    for _ in range(count):
+        signature, _, total_length, _ = CERT_HEADER.unpack_from(data, offset)
+        if signature != b"CERT" or total_length < CERT_HEADER.size or offset + total_length > len(data):
+            raise ValueError(f"Malformed certificate at offset {offset}")
+        yield data[offset:offset + total_length]
+        offset += total_length
+
+
+def index_objects(certificate):
+    """Maps object type to its payload, stepping from header to header once."""
+    objects = {}
+    offset = CERT_HEADER.size
+    end = len(certificate)
+    while offset + OBJECT_HEADER.size <= end:
+        _, object_type, length = OBJECT_HEADER.unpack_from(certificate, offset)
+        if length < OBJECT_HEADER.size or offset + length > end:
+            logging.debug(f"Stopping at malformed certificate object (type {object_type}, length {length}) at offset {offset}")
+            break
+        objects.setdefault(object_type, certificate[offset + OBJECT_HEADER.size:offset + length])
+        offset += length
+    return objects
+
+
+def index_chain(chain):
+    """Object index for every certificate in the chain, leaf first."""
+    return [index_objects(certificate) for certificate in iter_certificates(chain)]
+
+
+def read_manufacturer(payload):
+    """Manufacturer, model name and model number: u32 flags, then three u32-length strings padded to 4 bytes."""
+    names = []
+    offset = UINT32.size
+    for _ in range(3):
+        (length,) = UINT32.unpack_from(payload, offset)
+        offset += UINT32.size
+        names.append(bytes(payload[offset:offset + length]).split(b"\x00", 1)[0].decode("utf-8", errors="ignore"))
+        offset += (length + 3) & ~3
+    return names
+
+
+# SHA-256 of a group certificate -> its info dict; oldest entries are dropped first.
+# Keyed by digest so a long-running process never keeps the (up to 1 MiB) chains alive.
+CERTIFICATE_CACHE_SIZE = 1024
+_certificate_cache = {}
+_certificate_cache_lock = threading.Lock()
+
+
+def certificate_info(group_certificate):
+    """Device name and security level from the first certificate that carries each object.
+
+    Results are cached per certificate hash; every call returns a new dict.
+    """
+    digest = hashlib.sha256(group_certificate).digest()
+    info = _certificate_cache.get(digest)
+    if info is None:
+        info = _read_certificate_info(group_certificate)
+        with _certificate_cache_lock:
+            if len(_certificate_cache) >= CERTIFICATE_CACHE_SIZE:
+                del _certificate_cache[next(iter(_certificate_cache))]
+            _certificate_cache[digest] = info
+    return dict(info)
+
+
+def _read_certificate_info(group_certificate):
+    """Walks the chain for certificate_info(), stopping once both values are found."""
+    device_name, security_level = "Unknown Device", "Unknown"
+    try:
+        for objects in index_chain(group_certificate):
+            if security_level == "Unknown" and BASIC_INFO in objects:
+                security_level = f"SL{UINT32.unpack_from(objects[BASIC_INFO], BASIC_INFO_SECURITY_LEVEL)[0]}"
+            if device_name == "Unknown Device" and MANUFACTURER_INFO in objects:
+                device_name = " ".join(filter(None, read_manufacturer(objects[MANUFACTURER_INFO]))).strip() or device_name
+            if security_level != "Unknown" and device_name != "Unknown Device":
+                break
+    except (ValueError, struct.error) as e:
+        logging.debug(f"Could not walk the group certificate: {e}")
+
+    return {"device_name": device_name, "security_level": security_level}
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from modules.utils import PARSER_VERSION, normalize_result, read_buffer, transaction
+
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+# Eviction frees space down to this fraction of max_bytes, so it runs once per batch of inserts
+EVICT_TO = 0.9
+EVICT_BATCH = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    digest TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE INDEX IF NOT EXISTS files_digest ON files (digest);
+"""
+
+# One connection per process, thread and database; sqlite connections can't cross a fork or a thread
+_connections = {}
+
+
+class ParseCache:
+    """Persistent parse cache keyed by the SHA-256 of each file's content.
+
+    A (path, size, mtime_ns) index lets unchanged files skip hashing entirely.
+    Entries hold the normalized ``(data, device_type)`` result, are evicted least
+    recently used first once ``max_bytes`` is exceeded, and are all dropped when
+    ``parser_version`` differs from the one the cache was written with.
+
+    The cache pickles as its settings only, so it can be handed to batch workers;
+    each process opens its own connection. The version check and the start-up
+    eviction run once, in the process that hands the cache out. The total payload
+    size is kept in ``meta`` and updated with every insert, so no write scans the table.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_SIZE, parser_version=PARSER_VERSION):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.parser_version = parser_version
+        self.hits = 0
+        self.misses = 0
+        self.hash_skips = 0
+        self.evictions = 0
+        self._opened = False
+
+    def __getstate__(self):
+        if not self._opened:
+            self.connection  # check the version and evict here rather than in every worker task
+        return {"path": self.path, "max_bytes": self.max_bytes, "parser_version": self.parser_version}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+        self._opened = True
+
+    @property
+    def connection(self):
+        key = (os.getpid(), threading.get_ident(), os.path.abspath(self.path))
+        connection = _connections.get(key)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            _connections[key] = connection
+        if not self._opened:
+            self._opened = True
+            self._check_version(connection)
+            self._evict()
+        return connection
+
+    def _check_version(self, connection):
+        with transaction(connection):
+            row = connection.execute("SELECT value FROM meta WHERE key = 'parser_version'").fetchone()
+            if row is None or row[0] != self.parser_version:
+                self._clear(connection)
+            elif connection.execute("SELECT 1 FROM meta WHERE key = 'total_size'").fetchone() is None:
+                # Written before the running total existed
+                connection.execute(
+                    "INSERT INTO meta (key, value) SELECT 'total_size', COALESCE(SUM(size), 0) FROM entries"
+                )
+
+    def _clear(self, connection):
+        connection.execute("DELETE FROM files")
+        connection.execute("DELETE FROM entries")
+        connection.execute("DELETE FROM meta")
+        connection.execute("INSERT INTO meta (key, value) VALUES ('parser_version', ?)", (self.parser_version,))
+        connection.execute("INSERT INTO meta (key, value) VALUES ('total_size', '0')")
+
+    def _total_size(self, connection):
+        row = connection.execute("SELECT value FROM meta WHERE key = 'total_size'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _add_size(self, connection, delta):
+        connection.execute(
+            "INSERT INTO meta (key, value) VALUES ('total_size', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + ?",
+            (delta, delta),
+        )
+
+    def invalidate(self):
+        """Drops every cached result and the stat index."""
+        connection = self.connection
+        with transaction(connection):
+            self._clear(connection)
+
+    def _load(self, digest):
+        row = self.connection.execute("SELECT payload FROM entries WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        self.connection.execute("UPDATE entries SET last_used = ? WHERE digest = ?", (time.time(), digest))
+        self._count("hits")
+        return pickle.loads(row[0])
+
+    def _store(self, digest, result):
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        connection = self.connection
+        with transaction(connection):
+            row = connection.execute("SELECT size FROM entries WHERE digest = ?", (digest,)).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (digest, payload, size, last_used) VALUES (?, ?, ?, ?)",
+                (digest, payload, len(payload), time.time()),
+            )
+            self._add_size(connection, len(payload) - (row[0] if row else 0))
+            if self._total_size(connection) > self.max_bytes:
+                self._evict_locked(connection)
+
+    def _evict(self):
+        connection = self.connection
+        if self._total_size(connection) <= self.max_bytes:
+            return
+        with transaction(connection):
+            self._evict_locked(connection)
+
+    def _evict_locked(self, connection):
+        """Drops least recently used entries until the total is back under EVICT_TO of max_bytes."""
+        total = self._total_size(connection)  # another process may have evicted in the meantime
+        target = int(self.max_bytes * EVICT_TO)
+        freed = 0
+        while total - freed > target:
+            rows = connection.execute(
+                "SELECT digest, size FROM entries ORDER BY last_used LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for digest, size in rows:
+                if total - freed <= target:
+                    break
+                evicted.append((digest,))
+                freed += size
+            connection.executemany("DELETE FROM entries WHERE digest = ?", evicted)
+            connection.executemany("DELETE FROM files WHERE digest = ?", evicted)
+            self.evictions += len(evicted)
+        self._add_size(connection, -freed)
+
+    def _count(self, counter):
+        setattr(self, counter, getattr(self, counter) + 1)
+        self.connection.execute(
+            "INSERT INTO meta (key, value) VALUES (?, '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+            (counter,),
+        )
+
+    def get_or_parse(self, file_path, parse_buffer):
+        """Returns the cached result for a file, or parses it with ``parse_buffer(buffer)`` and stores it."""
+        stat = os.stat(file_path)
+        path = os.path.abspath(file_path)
+
+        row = self.connection.execute(
+            "SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row is not None:
+            cached = self._load(row[0])
+            if cached is not None:
+                self.hash_skips += 1
+                return cached
+
+        with read_buffer(file_path) as buffer:
+            digest = hashlib.sha256(buffer).hexdigest()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+            cached = self._load(digest)
+            if cached is not None:
+                return cached
+            result = normalize_result(tuple(parse_buffer(buffer)))
+
+        self._count("misses")
+        if result[0]:
+            self._store(digest, result)
+        return result
+
+    def stats(self):
+        """Counters for this process plus the totals persisted in the cache."""
+        persisted = dict(self.connection.execute("SELECT key, value FROM meta WHERE key IN ('hits', 'misses')").fetchall())
+        entries = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        size = self._total_size(self.connection)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hash_skips": self.hash_skips,
+            "evictions": self.evictions,
+            "total_hits": int(persisted.get("hits", 0)),
+            "total_misses": int(persisted.get("misses", 0)),
+            "entries": entries,
+            "size": size,
+        }
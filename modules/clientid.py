@@ -0,0 +1,58 @@
+import copy
+from functools import lru_cache
+from modules.detector import WIDEVINE
+from modules.logger import get_logger
+from modules.stats import stage
+
+logging = get_logger()
+
+
+def decode_client_id(client_id):
+    """Decodes a WVD client_id blob (a ClientIdentification protobuf) into plain values.
+
+    Results are memoized by content, so devices sharing a client ID are decoded once.
+    Every call returns its own copy, so changing a result never reaches the cache.
+    pywidevine (and with it protobuf) is only imported on the first call.
+    """
+    decoded = _decode_client_id(bytes(client_id))
+    return copy.deepcopy(decoded) if decoded is not None else None
+
+
+@lru_cache(maxsize=1024)
+def _decode_client_id(client_id):
+    try:
+        from google.protobuf.json_format import MessageToDict
+        from google.protobuf.message import DecodeError
+        from pywidevine.license_protocol_pb2 import ClientIdentification, DrmCertificate, SignedDrmCertificate
+    except ImportError as e:
+        logging.error(f"Decoding client IDs requires pywidevine: {e}")
+        return None
+
+    try:
+        with stage("widevine.client_id"):
+            message = ClientIdentification()
+            message.ParseFromString(client_id)
+            decoded = {
+                "token_type": ClientIdentification.TokenType.Name(message.type),
+                "client_info": {entry.name: entry.value for entry in message.client_info},
+            }
+            if message.HasField("client_capabilities"):
+                decoded["client_capabilities"] = MessageToDict(message.client_capabilities)
+
+            if message.type == ClientIdentification.TokenType.DRM_DEVICE_CERTIFICATE and message.token:
+                certificate = DrmCertificate()
+                certificate.ParseFromString(SignedDrmCertificate.FromString(message.token).drm_certificate)
+                decoded["system_id"] = certificate.system_id
+                decoded["serial_number"] = certificate.serial_number.hex()
+            return decoded
+    except DecodeError as e:
+        logging.warning(f"Error decoding client ID: {e}")
+        return None
+
+
+def client_id_info(data, device_type):
+    """Adds the decoded client ID to a parsed Widevine result in place."""
+    client_id = data.get("client_id") if data else None
+    if device_type == WIDEVINE and client_id:
+        data["client_id_info"] = decode_client_id(client_id)
+    return data
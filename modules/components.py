@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sqlite3
+from collections import namedtuple
+from functools import partial
+from modules.archive import ARCHIVE_ERRORS, is_archive, iter_archive
+from modules.indexer import scan_tree
+from modules.logger import get_logger
+from modules.utils import read_buffer, transaction
+
+logging = get_logger()
+
+# Blobs that are commonly shared between device files
+COMPONENT_FIELDS = ("group_certificate", "client_id", "vmp")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    device_type TEXT,
+    archive TEXT
+);
+CREATE INDEX IF NOT EXISTS files_digest ON files (digest);
+CREATE TABLE IF NOT EXISTS components (
+    path TEXT NOT NULL,
+    field TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (path, field)
+);
+CREATE INDEX IF NOT EXISTS components_digest ON components (field, digest);
+"""
+
+UpdateSummary = namedtuple("UpdateSummary", ["hashed", "unchanged", "removed"])
+
+
+class ComponentIndex:
+    """Persistent index of file and component hashes for finding duplicates across a collection.
+
+    Every file gets a SHA-256 of its content and of each COMPONENT_FIELDS blob found
+    when it is parsed. update() only reads files whose size or mtime changed since the
+    last run; members of zip/tar archives are indexed as ``archive/member``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, root, parse_buffer):
+        """Brings the index up to date with every file below root.
+
+        ``parse_buffer(buffer, file_path)`` returns ``(data, device_type)`` like main.parse_device_buffer.
+        """
+        root = os.path.abspath(root)
+        entries = scan_tree(root)
+        known = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self.connection.execute("SELECT path, size, mtime_ns FROM files WHERE archive IS NULL")
+            if path.startswith(root + os.sep)
+        }
+
+        hashed = unchanged = 0
+        with transaction(self.connection):
+            for file_path, (_, size, mtime_ns) in sorted(entries.items()):
+                if known.get(file_path) == (size, mtime_ns):
+                    unchanged += 1
+                    continue
+                try:
+                    hashed += self._index_file(file_path, size, mtime_ns, parse_buffer)
+                except (ValueError, *ARCHIVE_ERRORS) as e:
+                    logging.error(f"Failed to index {file_path}: {e}")
+
+            removed = [path for path in known if path not in entries]
+            for path in removed:
+                self._forget(path)
+
+        return UpdateSummary(hashed, unchanged, len(removed))
+
+    def _index_file(self, file_path, size, mtime_ns, parse_buffer):
+        if is_archive(file_path):
+            # Members are re-indexed whenever the archive itself changes
+            self._forget(file_path)
+            count = 0
+            for name, data in iter_archive(file_path, on_error=partial(self._member_error, file_path)):
+                self._store(os.path.join(file_path, name), size, mtime_ns, data, parse_buffer, archive=file_path)
+                count += 1
+            self._store_row(file_path, size, mtime_ns, "", "Archive")
+            return count
+
+        with read_buffer(file_path) as buffer:
+            self._store(file_path, size, mtime_ns, buffer, parse_buffer)
+        return 1
+
+    def _member_error(self, archive_path, name, error):
+        logging.error(f"Failed to index {name} in {archive_path}: {type(error).__name__}: {error}")
+
+    def _store(self, file_path, size, mtime_ns, buffer, parse_buffer, archive=None):
+        data, device_type = parse_buffer(buffer, file_path) or (None, None)
+        self._store_row(file_path, size, mtime_ns, hashlib.sha256(buffer).hexdigest(), device_type, archive)
+        self.connection.execute("DELETE FROM components WHERE path = ?", (file_path,))
+        for field in COMPONENT_FIELDS:
+            value = data.get(field) if data else None
+            if value:
+                self.connection.execute(
+                    "INSERT INTO components (path, field, digest, size) VALUES (?, ?, ?, ?)",
+                    (file_path, field, hashlib.sha256(value).hexdigest(), len(value)),
+                )
+
+    def _store_row(self, file_path, size, mtime_ns, digest, device_type, archive=None):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest, device_type, archive) VALUES (?, ?, ?, ?, ?, ?)",
+            (file_path, size, mtime_ns, digest, device_type, archive),
+        )
+
+    def _forget(self, path):
+        members = path + os.sep
+        self.connection.execute("DELETE FROM files WHERE path = ? OR substr(path, 1, ?) = ?", (path, len(members), members))
+        self.connection.execute("DELETE FROM components WHERE path = ? OR substr(path, 1, ?) = ?", (path, len(members), members))
+
+    def duplicates(self):
+        """Groups of byte-identical files, largest group first."""
+        rows = self.connection.execute(
+            "SELECT digest, group_concat(path, char(0)) FROM files WHERE digest != '' "
+            "GROUP BY digest HAVING COUNT(*) > 1 ORDER BY COUNT(*) DESC"
+        )
+        return [(digest, sorted(paths.split("\0"))) for digest, paths in rows]
+
+    def shared_components(self, field=None):
+        """Groups of files sharing a component: ``[(field, digest, size, [paths])]``, largest group first."""
+        query = ("SELECT field, digest, MAX(size), group_concat(path, char(0)) FROM components "
+                 + ("WHERE field = ? " if field else "")
+                 + "GROUP BY field, digest HAVING COUNT(*) > 1 ORDER BY COUNT(*) DESC")
+        rows = self.connection.execute(query, (field,) if field else ())
+        return [(field, digest, size, sorted(paths.split("\0"))) for field, digest, size, paths in rows]
+
+    def files_with_component(self, field, digest):
+        rows = self.connection.execute("SELECT path FROM components WHERE field = ? AND digest = ? ORDER BY path", (field, digest))
+        return [path for (path,) in rows]
+
+    def shared_with(self, file_path):
+        """Other files sharing the file's content or any of its components: ``{field or "file": [paths]}``."""
+        file_path = os.path.abspath(file_path)
+        shared = {}
+        row = self.connection.execute("SELECT digest FROM files WHERE path = ?", (file_path,)).fetchone()
+        if row is not None:
+            same = [path for (path,) in self.connection.execute("SELECT path FROM files WHERE digest = ? ORDER BY path", row)]
+            shared["file"] = [path for path in same if path != file_path]
+        for field, digest in self.connection.execute("SELECT field, digest FROM components WHERE path = ?", (file_path,)).fetchall():
+            shared[field] = [path for path in self.files_with_component(field, digest) if path != file_path]
+        return {field: paths for field, paths in shared.items() if paths}
@@ -0,0 +1,188 @@
+import base64
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+from modules.api import ParseResult, parse_bytes, parse_path
+from modules.logger import get_logger
+from modules.registry import FORMAT_HANDLERS, get_handler
+from modules.utils import PARSER_VERSION
+
+logging = get_logger()
+
+# Binary values travel as {"$bytes": "<base64>"} so the client gets bytes back
+BYTES_KEY = "$bytes"
+
+
+def _default(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {BYTES_KEY: base64.b64encode(value).decode("ascii")}
+    return str(value)
+
+
+def _object_hook(value):
+    if len(value) == 1 and BYTES_KEY in value:
+        return base64.b64decode(value[BYTES_KEY])
+    return value
+
+
+_encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def handle_request(request):
+    """Runs one decoded request and returns the response dict.
+
+    ``{"op": "parse_path", "path": ...}``, ``{"op": "parse_bytes", "data": <bytes>, "hint": ...}``
+    and ``{"op": "ping"}``; either parse op takes ``"client_id": true`` to decode Widevine client IDs.
+    """
+    if not isinstance(request, dict):
+        raise TypeError(f"expected a JSON object, got {type(request).__name__}")
+    op = request.get("op")
+    if op == "ping":
+        return {"ok": True, "parser_version": PARSER_VERSION, "pid": os.getpid()}
+    if op == "parse_path":
+        result = parse_path(request["path"])
+    elif op == "parse_bytes":
+        result = parse_bytes(request["data"], request.get("hint"))
+    else:
+        return {"ok": False, "error": f"Unknown op: {op!r}"}
+
+    if request.get("client_id") and result.ok:
+        from modules.clientid import client_id_info
+        client_id_info(result.data, result.device_type)
+    return {"ok": result.ok, **result._asdict()}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Newline-delimited JSON: one request per line, one response line per request."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = handle_request(json.loads(line, object_hook=_object_hook))
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"ok": False, "error": f"Bad request: {type(e).__name__}: {e}"}
+            self.wfile.write(_encoder.encode(response).encode("utf-8") + b"\n")
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(socket_path):
+    """Serves parse requests on a Unix socket until interrupted.
+
+    Every format handler is imported up front, and the in-process caches (BCert chains,
+    client IDs) stay warm across requests. The socket is only accessible to its owner.
+    """
+    if os.path.lexists(socket_path):
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            raise OSError(f"{socket_path} exists and is not a socket")
+        try:
+            with socket.socket(socket.AF_UNIX) as probe:
+                probe.connect(socket_path)
+            raise OSError(f"A daemon is already listening on {socket_path}")
+        except ConnectionRefusedError:
+            os.unlink(socket_path)  # left behind by a daemon that did not shut down cleanly
+
+    for device_type in FORMAT_HANDLERS:
+        get_handler(device_type)
+
+    previous_umask = os.umask(0o177)
+    try:
+        server = DaemonServer(socket_path, RequestHandler)
+    finally:
+        os.umask(previous_umask)
+
+    signal.signal(signal.SIGTERM, _terminate)
+    logging.info(f"Serving parse requests on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+
+class DaemonClient:
+    """Talks to a running daemon over one connection; results match parse_path()/parse_bytes()."""
+
+    def __init__(self, socket_path, timeout=None):
+        self.socket = socket.socket(socket.AF_UNIX)
+        self.socket.settimeout(timeout)
+        self.socket.connect(socket_path)
+        self.stream = self.socket.makefile("rwb")
+
+    def request(self, **request):
+        self.stream.write(_encoder.encode(request).encode("utf-8") + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        return json.loads(line, object_hook=_object_hook)
+
+    def _result(self, response):
+        if "path" not in response:
+            raise ValueError(response.get("error"))
+        return ParseResult(*(response[field] for field in ParseResult._fields))
+
+    def ping(self):
+        return self.request(op="ping")
+
+    def parse_path(self, path, client_id=False):
+        # The daemon may run from another working directory
+        return self._result(self.request(op="parse_path", path=os.path.abspath(path), client_id=client_id))
+
+    def parse_bytes(self, data, hint=None, client_id=False):
+        return self._result(self.request(op="parse_bytes", data=bytes(data), hint=hint, client_id=client_id))
+
+    def close(self):
+        self.stream.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    """``python -m modules.daemon SOCKET FILE...``: parses files through a running daemon, printing NDJSON."""
+    import argparse
+    from modules.render import NdjsonRenderer, parse_blob_mode
+
+    parser = argparse.ArgumentParser(description="Parse device files through a running Parser-DRM daemon.")
+    parser.add_argument("socket", help="socket the daemon was started with (main.py --serve SOCKET)")
+    parser.add_argument("files", nargs="+", help="device files to parse")
+    parser.add_argument("--client-id", action="store_true", help="decode the Widevine client ID")
+    parser.add_argument("--blobs", metavar="MODE", type=parse_blob_mode, default=("full", 0),
+                        help="binary fields as 'full' base64, 'truncate[:BYTES]' or 'hash[:BYTES]'")
+    args = parser.parse_args(argv)
+
+    renderer = NdjsonRenderer(sys.stdout, blob_mode=args.blobs, buffer_records=1)
+    failed = False
+    with DaemonClient(args.socket) as client:
+        for file_path in args.files:
+            result = client.parse_path(file_path, client_id=args.client_id)
+            if result.ok:
+                renderer.write(result.data, result.device_type, file_path)
+            else:
+                failed = True
+                print(f"{file_path}: {result.error}", file=sys.stderr)
+    renderer.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
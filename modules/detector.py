@@ -0,0 +1,60 @@
+import os
+
+PLAYREADY = "PlayReady"
+WIDEVINE = "Widevine"
+WIDEVINE_KEYBOX = "Widevine Keybox"
+WIDEVINE_KEYBOX_XML = "Widevine Keybox XML"
+
+KEYBOX_SIZE = 128
+KEYBOX_MAGIC = b"kbox"
+KEYBOX_MAGIC_OFFSET = 124
+
+# Enough bytes to see every signature, including the keybox magic at offset 124
+HEADER_SIZE = KEYBOX_SIZE
+
+EXTENSION_TYPES = {
+    ".prd": PLAYREADY,
+    ".dat": PLAYREADY,
+    ".bin": PLAYREADY,
+    ".wvd": WIDEVINE,
+    ".enc": WIDEVINE_KEYBOX,
+    ".keybox": WIDEVINE_KEYBOX,
+    ".xml": WIDEVINE_KEYBOX_XML,
+}
+
+
+def detect_format(header, size):
+    """Identifies a device file from its leading bytes and total size.
+
+    Returns ``(device_type, version)``; ``version`` is None for formats without one
+    and ``(None, None)`` is returned when nothing matches.
+    """
+    header = bytes(header[:HEADER_SIZE])
+
+    if header[:3] == b"WVD" and len(header) >= 4:
+        return WIDEVINE, header[3]
+
+    if header[:3] in (b"PRD", b"PRK") and len(header) >= 4:
+        return PLAYREADY, header[3]
+
+    if size == KEYBOX_SIZE and header[KEYBOX_MAGIC_OFFSET:KEYBOX_SIZE] == KEYBOX_MAGIC:
+        return WIDEVINE_KEYBOX, None
+
+    stripped = header.lstrip(b"\xef\xbb\xbf").lstrip()
+    if stripped.startswith(b"<?xml") or stripped.startswith(b"<AndroidAttestation"):
+        return WIDEVINE_KEYBOX_XML, None
+
+    return None, None
+
+
+def detect_file(file_path):
+    """Reads just the header of a file and runs detect_format on it."""
+    with open(file_path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        header = file.read(HEADER_SIZE)
+    return detect_format(header, size)
+
+
+def type_from_extension(file_path):
+    """Legacy extension-based guess, used when the content isn't recognised."""
+    return EXTENSION_TYPES.get(os.path.splitext(file_path)[1].lower())
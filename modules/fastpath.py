@@ -0,0 +1,207 @@
+import struct
+from construct import Container
+from construct.core import ConstError, FieldError, MappingError
+from modules.widevine import BaseDevice as WidevineBaseDevice
+
+# Largest blob accepted per length field. Widevine lengths are 16-bit, so only the
+# 32-bit PlayReady lengths (up to 4 GiB as declared) are really narrowed here.
+# Checked by locate() before anything is copied, so a corrupted length costs nothing.
+MAX_LENGTHS = {
+    "private_key_len": 64 * 1024,
+    "client_id_len": 64 * 1024,
+    "vmp_len": 64 * 1024,
+    "group_key_length": 64 * 1024,
+    "group_certificate_length": 1024 * 1024,
+}
+
+
+class FastStruct:
+    """Precompiled decoder for a device layout.
+
+    The layout is a list of ``(name, spec)`` pairs where ``spec`` is either a
+    ``struct`` format code or ``("bytes", length_field)`` for a length-prefixed blob.
+    Runs of fixed fields are merged into a single ``struct.Struct`` at build time, so
+    decoding is a handful of ``unpack_from`` calls instead of a field-by-field walk.
+    ``parse`` returns the same Container as the construct definition it mirrors;
+    ``locate`` only validates the buffer and returns where each field lives in it.
+    """
+
+    def __init__(self, name, layout, checks=None):
+        self.name = name
+        self.checks = checks or {}
+        self.fields = tuple(layout)
+        self.steps = []
+        self.run_offsets = []  # per step: (start, end) of each field relative to the run
+
+        pending_names, pending_codes = [], []
+        for field_name, spec in layout:
+            if isinstance(spec, tuple):
+                if pending_names:
+                    self.add_run(pending_names, pending_codes)
+                    pending_names, pending_codes = [], []
+                self.steps.append((None, (field_name, spec[1])))
+                self.run_offsets.append(None)
+            else:
+                pending_names.append(field_name)
+                pending_codes.append(spec)
+        if pending_names:
+            self.add_run(pending_names, pending_codes)
+
+    def add_run(self, names, codes):
+        compiled = struct.Struct(">" + "".join(codes))
+        offsets, start = [], 0
+        for code in codes:
+            end = start + struct.calcsize(">" + code)
+            offsets.append((start, end))
+            start = end
+        self.steps.append((compiled, tuple(names)))
+        self.run_offsets.append(tuple(offsets))
+
+    def parse(self, data):
+        data = memoryview(data)
+        result = Container()
+        offset = 0
+
+        for compiled, names in self.steps:
+            if compiled is None:
+                field_name, length_field = names
+                length = result[length_field]
+                end = offset + length
+                if end > len(data):
+                    raise FieldError(f"could not read enough bytes, expected {length}, found {len(data) - offset}\n    parsing -> {field_name}")
+                result[field_name] = bytes(data[offset:end])
+                offset = end
+                continue
+
+            if offset + compiled.size > len(data):
+                raise FieldError(f"could not read enough bytes, expected {compiled.size}, found {len(data) - offset}\n    parsing -> {names[0]}")
+            for field_name, value in zip(names, compiled.unpack_from(data, offset)):
+                check = self.checks.get(field_name)
+                result[field_name] = check(value) if check else value
+            offset += compiled.size
+
+        return result
+
+    def locate(self, data, max_lengths=None):
+        """Returns ``[start, end, ...]`` for every field in layout order, checking the buffer like ``parse``.
+
+        Nothing is copied; only the fixed runs are unpacked to read length fields and run the checks.
+        With ``max_lengths`` (e.g. MAX_LENGTHS), declared lengths above the limit are rejected too.
+        """
+        data = memoryview(data)
+        lengths = {}
+        offsets = []
+        offset = 0
+
+        for (compiled, names), run_offsets in zip(self.steps, self.run_offsets):
+            if compiled is None:
+                field_name, length_field = names
+                limit = max_lengths.get(length_field) if max_lengths else None
+                if limit is not None and lengths[length_field] > limit:
+                    raise FieldError(f"declared length {lengths[length_field]:,} exceeds the {limit:,} byte limit\n    parsing -> {field_name}")
+                end = offset + lengths[length_field]
+                if end > len(data):
+                    raise FieldError(f"could not read enough bytes, expected {lengths[length_field]}, found {len(data) - offset}\n    parsing -> {field_name}")
+                offsets += (offset, end)
+                offset = end
+                continue
+
+            if offset + compiled.size > len(data):
+                raise FieldError(f"could not read enough bytes, expected {compiled.size}, found {len(data) - offset}\n    parsing -> {names[0]}")
+            for field_name, value in zip(names, compiled.unpack_from(data, offset)):
+                check = self.checks.get(field_name)
+                if check:
+                    check(value)
+                lengths[field_name] = value
+            for start, end in run_offsets:
+                offsets += (offset + start, offset + end)
+            offset += compiled.size
+
+        return offsets
+
+
+def const(expected):
+    def check(value):
+        if value != expected:
+            raise ConstError(f"expected {expected!r} but parsed {value!r}\n    parsing -> signature")
+        return value
+    return check
+
+
+def enum(mapping):
+    def check(value):
+        try:
+            return mapping[value]
+        except KeyError:
+            raise MappingError(f"no decoding mapping for {value!r}\n    parsing -> type_")
+    return check
+
+
+def empty_flags(_):
+    # Padded(1, Optional(BitStruct(Padding(8)))) always yields an empty Container
+    return Container()
+
+
+WIDEVINE_CHECKS = {
+    "signature": const(b"WVD"),
+    "type_": enum({t.value: t.name for t in WidevineBaseDevice.Types}),
+    "flags": empty_flags,
+}
+
+WIDEVINE_HEADER = [
+    ("signature", "3s"),
+    ("version", "B"),
+    ("type_", "B"),
+    ("security_level", "B"),
+    ("flags", "B"),
+    ("private_key_len", "H"),
+    ("private_key", ("bytes", "private_key_len")),
+    ("client_id_len", "H"),
+    ("client_id", ("bytes", "client_id_len")),
+]
+
+WidevineFastVersion_1 = FastStruct("WidevineDeviceStructVersion_1", WIDEVINE_HEADER + [
+    ("vmp_len", "H"),
+    ("vmp", ("bytes", "vmp_len")),
+], WIDEVINE_CHECKS)
+
+WidevineFastVersion_2 = FastStruct("WidevineDeviceStructVersion_2", WIDEVINE_HEADER, WIDEVINE_CHECKS)
+
+PlayReadyFastVersion_1 = FastStruct("PlayReadyDeviceStructVersion_1", [
+    ("signature", "3s"),
+    ("version", "B"),
+    ("group_key_length", "I"),
+    ("group_key", ("bytes", "group_key_length")),
+    ("group_certificate_length", "I"),
+    ("group_certificate", ("bytes", "group_certificate_length")),
+])
+
+PlayReadyFastVersion_2 = FastStruct("PlayReadyDeviceStructVersion_2", [
+    ("signature", "3s"),
+    ("version", "B"),
+    ("group_certificate_length", "I"),
+    ("group_certificate", ("bytes", "group_certificate_length")),
+    ("encryption_key", "96s"),
+    ("signing_key", "96s"),
+])
+
+PlayReadyFastVersion_3 = FastStruct("PlayReadyDeviceStructVersion_3", [
+    ("signature", "3s"),
+    ("version", "B"),
+    ("group_key", "96s"),
+    ("encryption_key", "96s"),
+    ("signing_key", "96s"),
+    ("group_certificate_length", "I"),
+    ("group_certificate", ("bytes", "group_certificate_length")),
+])
+
+KeyboxFast = FastStruct("Keybox", [
+    ("stable_id", "32s"),
+    ("device_aes_key", "16s"),
+    ("device_id", "72s"),
+    ("body_crc", "I"),
+    ("magic", "4s"),
+])
+
+WIDEVINE_DECODERS = {1: WidevineFastVersion_1, 2: WidevineFastVersion_2}
+PLAYREADY_DECODERS = {1: PlayReadyFastVersion_1, 2: PlayReadyFastVersion_2, 3: PlayReadyFastVersion_3}
@@ -0,0 +1,124 @@
+import os
+import time
+from collections import namedtuple
+
+IndexChanges = namedtuple("IndexChanges", ["added", "changed", "removed"])
+
+
+def scan_tree(root):
+    """Recursively stats every regular file below root with os.scandir.
+
+    Returns ``{path: (inode, size, mtime_ns)}``; the stat results come from the
+    directory entries, so no extra stat call is made per file on most platforms.
+    """
+    entries = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            entries[entry.path] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return entries
+
+
+class DirectoryIndex:
+    """Keeps a snapshot of a directory tree and reports what changed between passes.
+
+    With ``snapshot_path`` the snapshot is persisted as JSON, so changes are also
+    detected across runs. refresh() only reports the changes; commit() persists them
+    once they were handled, so an interrupted pass is repeated by the next run.
+    """
+
+    def __init__(self, root, snapshot_path=None):
+        self.root = root
+        self.snapshot_path = snapshot_path
+        self.entries = self._load()
+        self.failed = set()  # kept in memory but left out of the saved snapshot
+
+    def _load(self):
+        import json
+
+        if not self.snapshot_path or not os.path.isfile(self.snapshot_path):
+            return {}
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if snapshot.get("root") != os.path.abspath(self.root):
+            return {}
+        return {path: tuple(values) for path, values in snapshot.get("entries", {}).items()}
+
+    def save(self):
+        import json
+
+        if not self.snapshot_path:
+            return
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = {path: values for path, values in self.entries.items() if path not in self.failed}
+        temporary_path = f"{self.snapshot_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({"root": os.path.abspath(self.root), "entries": entries}, file, separators=(",", ":"))
+        os.replace(temporary_path, self.snapshot_path)
+
+    def refresh(self):
+        """Runs one stat sweep and returns the differences; the snapshot is not saved until commit()."""
+        current = scan_tree(self.root)
+        previous = self.entries
+
+        added = sorted(path for path in current if path not in previous)
+        changed = sorted(path for path, values in current.items() if path in previous and previous[path] != values)
+        removed = sorted(path for path in previous if path not in current)
+
+        self.entries = current
+        return IndexChanges(added, changed, removed)
+
+    def _entry_for(self, path):
+        """The indexed file a result path belongs to: the path itself or the archive holding it."""
+        while path not in self.entries:
+            parent = os.path.dirname(path)
+            if not parent or parent == path:
+                return None
+            path = parent
+        return path
+
+    def commit(self, changes, failed=()):
+        """Saves the snapshot once ``changes`` were processed.
+
+        ``failed`` paths (or archive members) are left out of the saved snapshot, so the
+        next run parses them again; in memory they are only retried once they change.
+        """
+        handled = set(changes.added) | set(changes.changed) | set(changes.removed)
+        self.failed = (self.failed - handled) | {entry for entry in map(self._entry_for, failed) if entry}
+        if handled:
+            self.save()
+
+    def paths(self):
+        return sorted(self.entries)
+
+
+def watch(index, interval=5.0, passes=None):
+    """Polls the index every ``interval`` seconds, yielding IndexChanges whenever something changed.
+
+    The caller commits each change set once it has been handled.
+    """
+    completed = 0
+    while passes is None or completed < passes:
+        changes = index.refresh()
+        if changes.added or changes.changed or changes.removed:
+            yield changes
+        completed += 1
+        if passes is None or completed < passes:
+            time.sleep(interval)
@@ -1,13 +1,19 @@
 from construct import Struct, Bytes, Int32ub
-from colorama import Fore, Style
 from zlib import crc32
-from Crypto.Cipher import AES
-import struct, base64, requests, time, os
+import struct, base64, time, os
 import xml.etree.ElementTree as ET
-from modules.logger import setup_logging
-from cryptography import x509
+from array import array
+from collections import namedtuple
+from io import BytesIO
+from functools import lru_cache
+from modules.logger import get_logger
+from modules.detector import KEYBOX_MAGIC
+from modules.stats import stage
+from modules.utils import read_buffer
 
-logging = setup_logging()
+# requests, cryptography and pycryptodome are imported where they are used;
+# together they cost more to import than everything else in the parser.
+logging = get_logger()
 
 class KeyboxStruct:
     Keybox = Struct(
@@ -18,120 +24,367 @@ class KeyboxStruct:
         "magic" / Bytes(4)  # Remove `Const` constraint to allow flexibility
     )
     
+KEYBOX_FIELDS = {
+    "stable_id": (0, 32),         # Bytes 0-31
+    "device_aes_key": (32, 48),   # Bytes 32-47
+    "device_id": (48, 120),       # Bytes 48-119
+    "body_crc": (120, 124),       # Bytes 120-123
+    "magic": (124, 128)           # Bytes 124-127
+}
+
+@lru_cache(maxsize=256)
+def metadata_cipher(aes_key):
+    """ECB cipher for a device AES key; ECB keeps no state, so one object serves every decrypt."""
+    from Crypto.Cipher import AES
+
+    return AES.new(aes_key, AES.MODE_ECB)
+
+def split_keybox(keybox_data):
+    """Splits a 128-byte keybox into memoryview slices without copying."""
+    keybox_data = memoryview(keybox_data)
+    if len(keybox_data) != 128:
+        raise ValueError(f"Unexpected keybox length: {len(keybox_data)} bytes. Expected 128 bytes.")
+    return {name: keybox_data[start:end] for name, (start, end) in KEYBOX_FIELDS.items()}
+
 def parse_keybox(file_path):
     try:
         # Read the binary file
         with open(file_path, "rb") as f:
             keybox_data = f.read()
+        return parse_keybox_data(keybox_data)
 
-        # Ensure the file length is as expected
-        if len(keybox_data) != 128:
-            raise ValueError(f"{Fore.RED}Unexpected keybox length: {len(keybox_data)} bytes. Expected 128 bytes.{Style.RESET_ALL}")
-
-        # Define offsets for the fields
-        keybox_format = {
-            "stable_id": (0, 32),         # Bytes 0-31
-            "device_aes_key": (32, 48),   # Bytes 32-47
-            "device_id": (48, 120),       # Bytes 48-119
-            "body_crc": (120, 124),       # Bytes 120-123
-            "magic": (124, 128)           # Bytes 124-127
-        }
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found: {file_path}")
+    except RuntimeError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Error parsing keybox: {e}")
 
-        # Extract the fields
-        parsed_keybox = {
-            "Stable ID": keybox_data[keybox_format["stable_id"][0]:keybox_format["stable_id"][1]].hex(),
-            "Device AES Key": keybox_data[keybox_format["device_aes_key"][0]:keybox_format["device_aes_key"][1]].hex(),
-            "Device ID": keybox_data[keybox_format["device_id"][0]:keybox_format["device_id"][1]].hex(),
-            "Body CRC": f"0x{struct.unpack('>I', keybox_data[keybox_format['body_crc'][0]:keybox_format['body_crc'][1]])[0]:08X}",
-            "Magic": keybox_data[keybox_format["magic"][0]:keybox_format["magic"][1]].hex()
-        }
+def read_keybox_fields(keybox_data):
+    """Splits a 128-byte keybox and checks it: the raw fields, the CRC verdict and the decrypted metadata.
 
-        # Convert to Base64
-        base64_keybox = {
-            "Stable ID": base64.b64encode(bytes.fromhex(parsed_keybox["Stable ID"])).decode("utf-8"),
-            "Device AES Key": base64.b64encode(bytes.fromhex(parsed_keybox["Device AES Key"])).decode("utf-8"),
-            "Device ID": base64.b64encode(bytes.fromhex(parsed_keybox["Device ID"])).decode("utf-8")
-        }
+    Nothing is hex or base64 encoded here; encode_keybox_fields() does that when a report is needed.
+    ``decrypted_metadata`` is bytes, or a "Decryption failed" message.
+    """
+    with stage("keybox.split"):
+        fields = split_keybox(keybox_data)
+        body_crc = struct.unpack(">I", fields["body_crc"])[0]
 
-        # Analyze Device ID
-        device_id = bytes.fromhex(parsed_keybox["Device ID"])
-        device_id_analysis = {
-            "Flags": device_id[:4].hex(),
-            "Metadata": device_id[4:].hex()
-        }
+    # Recompute CRC over the body, then extend it over the CRC field instead of rehashing the prefix
+    device_id = fields["device_id"]
+    with stage("keybox.crc"):
+        computed_crc = crc32(device_id, crc32(fields["device_aes_key"], crc32(fields["stable_id"])))
+        crc_valid = computed_crc == body_crc
+        computed_crc_with_magic = crc32(fields["body_crc"], computed_crc) & 0xFFFFFFFF
 
-        # Recompute CRC
-        computed_crc = crc32(keybox_data[:120]) & 0xFFFFFFFF
-        crc_valid = computed_crc == struct.unpack('>I', keybox_data[keybox_format['body_crc'][0]:keybox_format['body_crc'][1]])[0]
+    # Attempt to decrypt Metadata using Device AES Key
+    aes_key = bytes(fields["device_aes_key"])
+    metadata = device_id[4:]
+    try:
+        # Add padding to make the metadata length a multiple of 16 bytes
+        padded_metadata = bytes(metadata) + b"\x00" * (16 - len(metadata) % 16)
+        with stage("keybox.aes"):
+            decrypted_metadata = metadata_cipher(aes_key).decrypt(padded_metadata)[:len(metadata)]  # Trim padding
+    except Exception as e:
+        decrypted_metadata = f"Decryption failed: {e}"
 
-        # Test CRC with additional scope (including magic)
-        computed_crc_with_magic = crc32(keybox_data[:124]) & 0xFFFFFFFF
+    return {
+        "stable_id": bytes(fields["stable_id"]),
+        "device_aes_key": aes_key,
+        "device_id": bytes(device_id),
+        "body_crc": body_crc,
+        "magic": bytes(fields["magic"]),
+        "crc_valid": crc_valid,
+        "crc_with_magic": computed_crc_with_magic,
+        "decrypted_metadata": decrypted_metadata,
+    }
 
-        # Attempt to decrypt Metadata using Device AES Key
-        aes_key = bytes.fromhex(parsed_keybox["Device AES Key"])
-        metadata = device_id[4:]
-        try:
-            # Add padding to make the metadata length a multiple of 16 bytes
-            padded_metadata = metadata + b"\x00" * (16 - len(metadata) % 16)
-            cipher = AES.new(aes_key, AES.MODE_ECB)
-            decrypted_metadata = cipher.decrypt(padded_metadata)
-            decrypted_metadata_hex = decrypted_metadata[:len(metadata)].hex()  # Trim padding
+# Printable ASCII stays, every other byte becomes "."
+_PRINTABLE_ASCII = bytes(value if 32 <= value <= 126 else ord(".") for value in range(256))
 
-            # Analyze decrypted metadata for potential fields
-            metadata_analysis = {
-                "Decrypted Hex": decrypted_metadata_hex,
-                "Decrypted ASCII": ''.join(chr(b) if 32 <= b <= 126 else '.' for b in decrypted_metadata[:len(metadata)])
-            }
+def encode_keybox_fields(fields):
+    """The hex/base64 views of read_keybox_fields() output, in the tuple parse_keybox_data returns."""
+    parsed_keybox = {
+        "Stable ID": fields["stable_id"].hex(),
+        "Device AES Key": fields["device_aes_key"].hex(),
+        "Device ID": fields["device_id"].hex(),
+        "Body CRC": f"0x{fields['body_crc']:08X}",
+        "Magic": fields["magic"].hex()
+    }
 
-        except Exception as e:
-            decrypted_metadata_hex = f"{Fore.RED}Decryption failed: {e}{Style.RESET_ALL}"
-            metadata_analysis = {}
+    base64_keybox = {
+        "Stable ID": base64.b64encode(fields["stable_id"]).decode("utf-8"),
+        "Device AES Key": base64.b64encode(fields["device_aes_key"]).decode("utf-8"),
+        "Device ID": base64.b64encode(fields["device_id"]).decode("utf-8")
+    }
 
-        return parsed_keybox, base64_keybox, device_id_analysis, crc_valid, computed_crc_with_magic, decrypted_metadata_hex, metadata_analysis
+    # Analyze Device ID
+    device_id = fields["device_id"]
+    device_id_analysis = {
+        "Flags": device_id[:4].hex(),
+        "Metadata": device_id[4:].hex()
+    }
 
-    except FileNotFoundError:
-        raise FileNotFoundError(f"{Fore.RED}File not found: {file_path}{Style.RESET_ALL}")
+    decrypted_metadata = fields["decrypted_metadata"]
+    if isinstance(decrypted_metadata, str):
+        decrypted_metadata_hex = decrypted_metadata
+        metadata_analysis = {}
+    else:
+        decrypted_metadata_hex = decrypted_metadata.hex()
+        # Analyze decrypted metadata for potential fields
+        metadata_analysis = {
+            "Decrypted Hex": decrypted_metadata_hex,
+            "Decrypted ASCII": decrypted_metadata.translate(_PRINTABLE_ASCII).decode("ascii")
+        }
+
+    return (parsed_keybox, base64_keybox, device_id_analysis, fields["crc_valid"], fields["crc_with_magic"],
+            decrypted_metadata_hex, metadata_analysis)
+
+def parse_keybox_data(keybox_data):
+    try:
+        return encode_keybox_fields(read_keybox_fields(keybox_data))
     except Exception as e:
-        raise RuntimeError(f"{Fore.RED}Error parsing keybox: {e}{Style.RESET_ALL}")
+        raise RuntimeError(f"Error parsing keybox: {e}")
     
     
+# One keybox record: stable_id, device_aes_key, device_id, body_crc, magic
+KEYBOX_RECORD = struct.Struct(">32s16s72sI4s")
+_MAGIC_TABLES = [bytes(int(value == expected) for value in range(256)) for expected in KEYBOX_MAGIC]
+
+
+class KeyboxTable(namedtuple("KeyboxTable", ["stable_ids", "device_aes_keys", "device_ids", "body_crcs",
+                                             "computed_crcs", "magic_valid", "trailing_bytes"])):
+    """Column-wise results for a container of concatenated 128-byte keyboxes.
+
+    The fixed-width fields are stored back to back in one bytes object per column,
+    the stored and recomputed body CRCs as ``array("I")`` and the magic check as one
+    0/1 byte per record. ``trailing_bytes`` counts what was left after the last full record.
+    """
+
+    __slots__ = ()
+
+    @property
+    def count(self):
+        return len(self.body_crcs)
+
+    def field(self, column, width, index):
+        return column[index * width:(index + 1) * width]
+
+    def crc_valid(self, index):
+        return self.body_crcs[index] == self.computed_crcs[index]
+
+    def invalid(self):
+        """Indexes of records with a wrong magic or a CRC mismatch."""
+        return [index for index, (stored, computed, magic) in enumerate(zip(self.body_crcs, self.computed_crcs, self.magic_valid))
+                if stored != computed or not magic]
+
+    def decrypted_metadata(self, index):
+        """Device ID metadata decrypted with the record's device AES key, as hex (like parse_keybox_data)."""
+        metadata = self.field(self.device_ids, 72, index)[4:]
+        padded_metadata = metadata + b"\x00" * (16 - len(metadata) % 16)
+        return metadata_cipher(self.field(self.device_aes_keys, 16, index)).decrypt(padded_metadata)[:len(metadata)].hex()
+
+    def row(self, index, decrypt=False):
+        row = {
+            "index": index,
+            "stable_id": self.field(self.stable_ids, 32, index).hex(),
+            "device_id": self.field(self.device_ids, 72, index).hex(),
+            "body_crc": f"0x{self.body_crcs[index]:08X}",
+            "crc_valid": self.crc_valid(index),
+            "magic_valid": bool(self.magic_valid[index]),
+        }
+        if decrypt:
+            row["decrypted_metadata"] = self.decrypted_metadata(index)
+        return row
+
+    def rows(self, decrypt=False):
+        return (self.row(index, decrypt) for index in range(self.count))
+
+
+def split_keybox_container(buffer):
+    """Validates every record of a keybox container in bulk and returns a KeyboxTable.
+
+    The buffer is treated as an N x 128 array. Fields are split with one
+    ``struct.iter_unpack`` pass. The magic is checked per byte column through strided
+    views (``buffer[124::128]`` holds every record's first magic byte), so the common
+    all-valid case is four bytes comparisons. Body CRCs run over zero-copy slices of
+    the buffer.
+    """
+    view = memoryview(buffer).cast("B")
+    count = len(view) // KEYBOX_RECORD.size
+    records = view[:count * KEYBOX_RECORD.size]
+
+    with stage("keybox.container.split"):
+        if count:
+            stable_ids, device_aes_keys, device_ids, body_crcs, _ = zip(*KEYBOX_RECORD.iter_unpack(records))
+        else:
+            stable_ids = device_aes_keys = device_ids = body_crcs = ()
+        columns = b"".join(stable_ids), b"".join(device_aes_keys), b"".join(device_ids), array("I", body_crcs)
+
+    with stage("keybox.container.magic"):
+        magic_columns = [records[offset::KEYBOX_RECORD.size] for offset in range(124, 128)]
+        if all(column == bytes([expected]) * count for column, expected in zip(magic_columns, KEYBOX_MAGIC)):
+            magic_valid = b"\x01" * count
+        else:
+            # 1 where a column holds its expected byte; AND the four columns as big integers
+            flags = -1
+            for column, table in zip(magic_columns, _MAGIC_TABLES):
+                flags &= int.from_bytes(column.tobytes().translate(table), "big")
+            magic_valid = flags.to_bytes(count, "big")
+
+    with stage("keybox.container.crc"):
+        computed_crcs = array("I", [crc32(records[offset:offset + 120]) for offset in range(0, len(records), KEYBOX_RECORD.size)])
+
+    return KeyboxTable(*columns[:3], columns[3], computed_crcs, magic_valid, len(view) - len(records))
+
+
+def parse_keybox_container(file_path):
+    """Memory-maps a container of concatenated keyboxes and validates every record (see split_keybox_container)."""
+    with read_buffer(file_path, mmap_threshold=0) as buffer:
+        table = split_keybox_container(buffer)
+    if table.trailing_bytes:
+        logging.warning(f"{file_path}: {table.trailing_bytes} trailing bytes after {table.count:,} keyboxes")
+    return table
+
+
+CRL_TTL = 600  # seconds a fetched revocation list is reused within one process
+CRL_RETRY = 60  # seconds before a failed fetch is retried
+_crl_cache = {}
+
 def check_keybox_revocation():
+    cached = _crl_cache.get("crl")
+    if cached and time.monotonic() < cached[0]:
+        return cached[1]
+
+    import requests
+
     api = f'https://android.googleapis.com/attestation/status?{time.time_ns()}'
     try:
-        crl = requests.get(api, headers={'Cache-Control': 'max-age=0'}).json()
-        return crl
+        with stage("xml.crl"):
+            crl = requests.get(api, headers={'Cache-Control': 'max-age=0'}, timeout=10).json()
+        _crl_cache["crl"] = (time.monotonic() + CRL_TTL, crl)
     except Exception:
-        return {"entries": {}}
+        crl = {"entries": {}}
+        _crl_cache["crl"] = (time.monotonic() + CRL_RETRY, crl)
+    return crl
 
+@lru_cache(maxsize=1024)
 def parse_cert(cert):
+    from cryptography import x509
+
     try:
-        cert = "\n".join(line.strip() for line in cert.strip().split("\n"))
-        parsed = x509.load_pem_x509_certificate(cert.encode())
-        serial = f'{parsed.serial_number:x}'
+        with stage("xml.certificate"):
+            cert = "\n".join(line.strip() for line in cert.strip().split("\n"))
+            parsed = x509.load_pem_x509_certificate(cert.encode())
+            serial = f'{parsed.serial_number:x}'
         return serial
     except Exception:
         return None
 
-def check(xml_file):
-    try:
-        certs = [elem.text for elem in ET.parse(xml_file).getroot().iter() if elem.tag == 'Certificate']
+def local_name(tag):
+    return tag.rsplit("}", 1)[-1]
 
-        if len(certs) < 4:
-            return {"Status": "Invalid XML"}
+def iter_keybox_entries(xml_file):
+    """Streams the keybox entries of an XML document with iterparse.
+
+    Yields one dict per ``Keybox`` element with its DeviceID, every certificate in
+    document order and the certificates grouped per key algorithm. Elements are
+    cleared as soon as they are consumed, so memory stays flat however many entries
+    the document holds. Documents without ``Keybox`` elements yield a single entry.
+    """
+    root, entry, algorithm = None, None, None
+
+    for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+        tag = local_name(elem.tag)
+
+        if event == "start":
+            if root is None:
+                root = elem
+            if tag == "Keybox":
+                entry = {"device_id": elem.get("DeviceID"), "certificates": [], "chains": {}}
+            elif tag == "Key":
+                algorithm = (elem.get("algorithm") or "").lower() or None
+            continue
+
+        if tag == "Certificate":
+            if entry is None:
+                entry = {"device_id": None, "certificates": [], "chains": {}}
+            text = elem.text or ""
+            entry["certificates"].append(text)
+            if algorithm:
+                entry["chains"].setdefault(algorithm, []).append(text)
+            elem.clear()
+        elif tag == "Key":
+            algorithm = None
+            elem.clear()
+        elif tag == "Keybox":
+            yield entry
+            entry = None
+            elem.clear()
+            root.clear()
+        elif elem is not root and tag != "CertificateChain":
+            # Leaves such as PrivateKey are dropped once read; containers are cleared with their Keybox
+            elem.clear()
+
+    if entry is not None and entry["certificates"]:
+        yield entry
+
+def check_entry(entry, get_crl):
+    """Extracts the EC/RSA leaf serials of one keybox entry and checks them against the CRL."""
+    chains = entry["chains"]
+    if "ecdsa" in chains and "rsa" in chains:
+        ec_cert, rsa_cert = chains["ecdsa"][0], chains["rsa"][0]
+    elif len(entry["certificates"]) >= 4:
+        ec_cert, rsa_cert = entry["certificates"][0], entry["certificates"][3]
+    else:
+        return {"Status": "Invalid XML"}
+
+    ec_cert_sn = parse_cert(ec_cert)
+    rsa_cert_sn = parse_cert(rsa_cert)
 
-        ec_cert_sn = parse_cert(certs[0])
-        rsa_cert_sn = parse_cert(certs[3])
+    if not ec_cert_sn or not rsa_cert_sn:
+        return {"Status": "Missing Serial"}
 
-        if not ec_cert_sn or not rsa_cert_sn:
-            return {"Status": "Missing Serial"}
+    crl = get_crl()
+    is_revoked = any(sn in crl.get("entries", {}) for sn in (ec_cert_sn, rsa_cert_sn))
 
-        crl = check_keybox_revocation()
-        is_revoked = any(sn in crl.get("entries", {}) for sn in (ec_cert_sn, rsa_cert_sn))
+    return {
+        "EC Cert SN": ec_cert_sn,
+        "RSA Cert SN": rsa_cert_sn,
+        "Revoked Status": "Revoked" if is_revoked else "Valid"
+    }
+
+def check(xml_file, crl=None):
+    """Checks every keybox in an XML document; the CRL is fetched at most once.
+
+    A document with a single keybox returns that keybox's result directly.
+    """
+    crl_holder = [crl]
+
+    def get_crl():
+        if crl_holder[0] is None:
+            crl_holder[0] = check_keybox_revocation()
+        return crl_holder[0]
+
+    try:
+        results = []
+        for entry in iter_keybox_entries(xml_file):
+            result = check_entry(entry, get_crl)
+            if entry["device_id"]:
+                result = {"Device ID": entry["device_id"], **result}
+            results.append(result)
+
+        if not results:
+            return {"Status": "Invalid XML"}
+        if len(results) == 1:
+            result = dict(results[0])
+            result.pop("Device ID", None)
+            return result
 
         return {
-            "EC Cert SN": ec_cert_sn,
-            "RSA Cert SN": rsa_cert_sn,
-            "Revoked Status": "Revoked" if is_revoked else "Valid"
+            "Keyboxes": len(results),
+            "Revoked": sum(1 for result in results if result.get("Revoked Status") == "Revoked"),
+            "Entries": results
         }
 
     except ET.ParseError:
@@ -140,11 +393,49 @@ def check(xml_file):
         return {"Status": "Processing Error"}
 
 def keybox_main(path):
+    """Checks one XML file, or every XML file below a directory (keyed by path)."""
     if os.path.isfile(path) and path.endswith(".xml"):
         return check(path)
-    else:
-        for root, _, files in os.walk(path):
-            for file in files:
-                if file.endswith('.xml'):
-                    xml_file = os.path.join(root, file)
-                    return check(xml_file)
\ No newline at end of file
+
+    results, crl = {}, None
+    for root, _, files in os.walk(path):
+        for file in sorted(files):
+            if file.endswith('.xml'):
+                if crl is None:
+                    crl = check_keybox_revocation()
+                xml_file = os.path.join(root, file)
+                results[xml_file] = check(xml_file, crl=crl)
+    return results
+
+def parse_keybox_buffer(buffer, version=None):
+    """Parses an in-memory 128-byte keybox into its raw fields and CRC/metadata checks; see keybox_report()."""
+    try:
+        return read_keybox_fields(buffer)
+    except Exception as e:
+        logging.error(f"Error parsing Widevine Keybox file: {e}")
+        return None
+
+def keybox_report(data):
+    """Builds the report shown by the CLI from a parsed keybox; the hex/base64 encoding happens here."""
+    if not isinstance(data, dict) or not isinstance(data.get("stable_id"), (bytes, bytearray, memoryview)):
+        return data  # already a report: a --keyboxes row or a LazyRecord
+
+    parsed_keybox, base64_keybox, device_id_analysis, crc_valid, crc_with_magic, decrypted_metadata, metadata_analysis = encode_keybox_fields(data)
+    return {
+        "parsed_keybox": parsed_keybox,
+        "base64_keybox": base64_keybox,
+        "device_id_analysis": device_id_analysis,
+        "crc_valid": crc_valid,
+        "crc_with_magic": crc_with_magic,
+        "decrypted_metadata": decrypted_metadata,
+        "metadata_analysis": metadata_analysis
+    }
+
+def check_keybox_xml_buffer(buffer, version=None):
+    """Checks an in-memory keybox XML document."""
+    try:
+        with stage("xml.check"):
+            return check(BytesIO(buffer))
+    except Exception as e:
+        logging.error(f"Error processing Widevine Keybox XML file: {e}")
+        return {"Status": "Error"}
@@ -1,23 +1,159 @@
+import atexit
 import logging
 import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 
-def setup_logging(name="Parser-DRM", log_file="logs/debug.log", level=logging.DEBUG):
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+_listeners = []
+_handlers = []
+_worker_queue = None
+_lock = threading.Lock()
 
-    formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 
-    file_handler = logging.FileHandler(log_file, encoding="utf-8")
-    file_handler.setFormatter(formatter)
+class RateLimitFilter(logging.Filter):
+    """Lets through at most ``burst`` identical records every ``interval`` seconds.
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
+    Records are identical when their level and rendered message match (e.g. the same
+    struct-version warning for every file that fails it). Repeats are counted instead of
+    written; the next record that passes, or flush(), reports how many were suppressed.
+    ERROR and above are never suppressed.
+    """
 
+    max_keys = 4096
+
+    def __init__(self, burst=5, interval=10.0):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.windows = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+
+        message = record.getMessage()
+        key = (record.levelno, message)
+        now = time.monotonic()
+        started, count, suppressed = self.windows.get(key, (now, 0, 0))
+
+        if now - started >= self.interval:
+            started, count = now, 0
+        if count >= self.burst:
+            self.windows[key] = (started, count, suppressed + 1)
+            return False
+
+        if suppressed:
+            record.msg = f"{message} ({suppressed:,} identical messages suppressed)"
+            record.args = None
+        self.windows[key] = (started, count + 1, 0)
+        if len(self.windows) > self.max_keys:
+            self._prune(now)
+        return True
+
+    def _prune(self, now):
+        """Forgets expired windows that have nothing left to report."""
+        for key, (started, _, suppressed) in list(self.windows.items()):
+            if not suppressed and now - started >= self.interval:
+                del self.windows[key]
+
+    def flush(self, logger):
+        pending = [(key, suppressed) for key, (_, _, suppressed) in self.windows.items() if suppressed]
+        self.windows.clear()
+        for (levelno, message), suppressed in pending:
+            logger.log(levelno, f"{message} ({suppressed:,} identical messages suppressed)")
+
+
+def setup_logging(name="Parser-DRM", log_file="logs/debug.log", level=logging.DEBUG, burst=5, interval=10.0, console=True):
+    """Attaches a QueueHandler to the logger; a background QueueListener does the file/console writes.
+
+    Calling it again only updates the level.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    # Prevent duplicate handlers if logger is reused
-    if not logger.hasHandlers():
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+    with _lock:
+        if _handlers:
+            return logger
+
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+        formatter = logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+        file_handler = logging.FileHandler(log_file, encoding="utf-8")
+        file_handler.setFormatter(formatter)
+
+        _handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(formatter)
+            _handlers.append(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(burst, interval))
+
+        # Prevent duplicate handlers if logger is reused
+        logger.handlers = [queue_handler]
+        logger.propagate = False
+
+        listener = QueueListener(log_queue, *_handlers)
+        listener.start()
+        _listeners.append(listener)
+        atexit.register(shutdown_logging, name)
 
     return logger
+
+
+def worker_log_queue():
+    """Returns a multiprocessing queue drained into the same handlers, for batch workers.
+
+    Pass it to configure_worker() in each worker process.
+    """
+    global _worker_queue
+    import multiprocessing
+
+    with _lock:
+        if _worker_queue is None and _handlers:
+            _worker_queue = multiprocessing.Queue()
+            listener = QueueListener(_worker_queue, *_handlers)
+            listener.start()
+            _listeners.append(listener)
+    return _worker_queue
+
+
+def configure_worker(log_queue, level=logging.DEBUG, name="Parser-DRM", burst=5, interval=10.0):
+    """Process-pool initializer: routes the worker's records to the parent's listener."""
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    if log_queue is None:
+        logger.handlers = [logging.NullHandler()]
+        return
+
+    queue_handler = QueueHandler(log_queue)
+    rate_limit = RateLimitFilter(burst, interval)
+    queue_handler.addFilter(rate_limit)
+    logger.handlers = [queue_handler]
+
+    # Workers can exit through os._exit, so report suppressed repeats when the worker shuts down
+    from multiprocessing.util import Finalize
+    Finalize(logger, rate_limit.flush, args=(logger,), exitpriority=100)
+
+
+def shutdown_logging(name="Parser-DRM"):
+    """Reports suppressed repeats and stops the listeners once every queued record is written."""
+    logger = logging.getLogger(name)
+    for handler in logger.handlers:
+        for log_filter in handler.filters:
+            if isinstance(log_filter, RateLimitFilter):
+                log_filter.flush(logger)
+
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def get_logger(name="Parser-DRM"):
+    """Returns the shared logger without creating files or handlers; setup_logging() attaches those."""
+    return logging.getLogger(name)
@@ -0,0 +1,162 @@
+import os
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from colorama import Fore, Style
+from modules.detector import type_from_extension
+from modules.indexer import DirectoryIndex
+
+PickerEntry = namedtuple("PickerEntry", ["name", "path", "device_type"])
+
+HELP = "NUMBER: open  Enter: next  p: back  /TEXT: filter  t TYPE: format  q: quit"
+
+
+def load_entries(directory_path):
+    """Every file below the directory from one DirectoryIndex sweep; the type is guessed from the extension."""
+    index = DirectoryIndex(directory_path)
+    index.refresh()
+    return [
+        PickerEntry(os.path.relpath(path, directory_path), path, type_from_extension(path))
+        for path in sorted(index.entries)
+    ]
+
+
+def matches_format(entry, value):
+    """``value`` is part of a device type ("widevine", "keybox") or an extension ("wvd", ".prd")."""
+    value = value.lower()
+    return (value in (entry.device_type or "unknown").lower()
+            or os.path.splitext(entry.path)[1].lower() == "." + value.lstrip("."))
+
+
+class Picker:
+    """Paginated device picker with substring and format filters.
+
+    The entries on the current page are parsed on a background thread, top first,
+    while the user reads the listing; choosing one then waits only for whatever is
+    left of its parse. Parses queued for entries that scrolled out of view are
+    cancelled, and at most ``keep_results`` finished results are kept.
+    """
+
+    def __init__(self, entries, parse_func, page_size=20, keep_results=64, clear=None, input_func=input):
+        self.entries = entries
+        self.parse_func = parse_func
+        self.page_size = page_size
+        self.keep_results = keep_results
+        self.clear = clear
+        self.input_func = input_func
+        self.text = ""
+        self.device_format = ""
+        self.page = 0
+        self.filtered = entries
+        self.message = ""
+        self.futures = OrderedDict()  # path -> Future, oldest first
+        # One worker: parses are cheap and a ParseCache connection stays on one thread
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preparse")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def apply_filters(self):
+        text = self.text.lower()
+        self.filtered = [
+            entry for entry in self.entries
+            if text in entry.name.lower() and (not self.device_format or matches_format(entry, self.device_format))
+        ]
+        self.page = 0
+
+    @property
+    def page_count(self):
+        return max(1, -(-len(self.filtered) // self.page_size))
+
+    def visible(self):
+        start = self.page * self.page_size
+        return self.filtered[start:start + self.page_size]
+
+    def submit(self, entry):
+        future = self.futures.get(entry.path)
+        if future is None or future.cancelled():
+            future = self.executor.submit(self.parse_func, entry.path)
+        self.futures[entry.path] = future
+        self.futures.move_to_end(entry.path)
+        return future
+
+    def prefetch(self):
+        """Queues the visible entries and drops work and results for everything else."""
+        visible = self.visible()
+        wanted = {entry.path for entry in visible}
+        for path, future in list(self.futures.items()):
+            if path not in wanted and future.cancel():
+                del self.futures[path]
+        for entry in visible:
+            self.submit(entry)
+        while len(self.futures) > max(self.keep_results, len(visible)):
+            self.futures.popitem(last=False)
+
+    def draw(self):
+        if self.clear:
+            self.clear()
+        box_width = 78
+        title = f" Available Device Files ({len(self.filtered):,} of {len(self.entries):,}) "
+        print(f"\n{Fore.CYAN}╔{'═' * (box_width - 2)}╗{Fore.RESET}")
+        print(f"║{title.center(box_width - 2)}║")
+        filters = " ".join(filter(None, [f"text '{self.text}'" if self.text else "",
+                                         f"format '{self.device_format}'" if self.device_format else ""]))
+        if filters:
+            print(f"║{Fore.MAGENTA}{(' Filtered by ' + filters)[:box_width - 2]:<{box_width - 2}}{Fore.RESET}║")
+        print(f"╠{'═' * (box_width - 2)}╣")
+
+        start = self.page * self.page_size
+        for index, entry in enumerate(self.visible(), start + 1):
+            name = entry.name if len(entry.name) <= 44 else "..." + entry.name[-41:]
+            future = self.futures.get(entry.path)
+            ready = "✓" if future is not None and future.done() else " "
+            print(f"║ {Fore.YELLOW}{index:>6} . {Fore.GREEN}{name:<44} {Fore.CYAN}{(entry.device_type or '?'):<19}"
+                  f"{Fore.GREEN}{ready}{Fore.CYAN} ║{Fore.RESET}")
+        if not self.filtered:
+            print(f"║ {Fore.RED}{'No files match the filters.':<{box_width - 4}}{Fore.CYAN} ║{Fore.RESET}")
+
+        print(f"╠{'═' * (box_width - 2)}╣")
+        print(f"║{f' Page {self.page + 1:,} of {self.page_count:,}':<{box_width - 2}}║")
+        print(f"║{(' ' + HELP)[:box_width - 2]:<{box_width - 2}}║")
+        print(f"╚{'═' * (box_width - 2)}╝{Style.RESET_ALL}")
+        if self.message:
+            print(f"{Fore.RED}{self.message}{Style.RESET_ALL}")
+            self.message = ""
+
+    def handle(self, command):
+        """Applies one command; returns the chosen entry, or None to keep browsing."""
+        if command in ("", "n"):
+            self.page = min(self.page + 1, self.page_count - 1)
+        elif command == "p":
+            self.page = max(self.page - 1, 0)
+        elif command.startswith("/"):
+            self.text = command[1:].strip()
+            self.apply_filters()
+        elif command == "t" or command.startswith("t "):
+            self.device_format = command[1:].strip()
+            self.apply_filters()
+        elif command.isdigit():
+            choice = int(command)
+            if 1 <= choice <= len(self.filtered):
+                return self.filtered[choice - 1]
+            self.message = f"Invalid choice. Please enter a number between 1 and {len(self.filtered)}."
+        else:
+            self.message = f"Unknown command: {command}"
+        return None
+
+    def run(self):
+        """Shows pages until a file is chosen; returns ``(entry, parse_result)`` or None on quit."""
+        try:
+            while True:
+                self.prefetch()
+                self.draw()
+                try:
+                    command = self.input_func(f"\n{Fore.CYAN}Choice: {Style.RESET_ALL}").strip()
+                except EOFError:
+                    return None
+                if command == "q":
+                    return None
+                entry = self.handle(command)
+                if entry is not None:
+                    return entry, self.submit(entry).result()
+        finally:
+            self.close()
@@ -0,0 +1,114 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from modules.batch import BatchSummary, _parse_worker
+from modules.detector import type_from_extension
+from modules.logger import get_logger
+
+logging = get_logger()
+
+_DONE = object()
+
+
+def read_file(file_path):
+    with open(file_path, "rb") as file:
+        return file.read()
+
+
+def _missing_file(file_path):
+    # What read_device_file returns when the file cannot be read
+    return None, type_from_extension(file_path)
+
+
+async def iter_pipeline(file_paths, parse_buffer, workers=None, summary=None, initializer=None, initargs=(),
+                        max_reads=16, queue_size=None):
+    """Reads files concurrently and parses them on a process pool, yielding BatchResults as they finish.
+
+    ``max_reads`` reader coroutines each keep one blocking read in flight on a thread pool,
+    which hides per-file latency on network storage. ``parse_buffer(buffer, file_path)``
+    (e.g. main.parse_device_buffer) runs on ``workers`` processes. Both hand-offs go through
+    bounded queues, so when the consumer stops pulling results the parsers and then the
+    readers wait instead of piling up buffers.
+    """
+    loop = asyncio.get_running_loop()
+    workers = workers or os.cpu_count() or 1
+    queue_size = queue_size or workers * 4
+    summary = summary if summary is not None else BatchSummary()
+    paths = iter(file_paths)
+    buffers = asyncio.Queue(queue_size)
+    results = asyncio.Queue(queue_size)
+
+    async def reader(read_executor):
+        # The path iterator is shared; the event loop runs one coroutine at a time
+        for file_path in paths:
+            started = loop.time()
+            try:
+                data = await loop.run_in_executor(read_executor, read_file, file_path)
+            except OSError as e:
+                logging.error(f"Failed to read file: {e}")
+                data = None
+            await buffers.put((file_path, data, loop.time() - started))
+
+    async def parser(parse_executor):
+        while (item := await buffers.get()) is not _DONE:
+            file_path, data, read_elapsed = item
+            parse_func = _missing_file if data is None else partial(parse_buffer, data)
+            result = await loop.run_in_executor(parse_executor, _parse_worker, parse_func, file_path)
+            await results.put(result._replace(elapsed=result.elapsed + read_elapsed))
+
+    async def run(read_executor, parse_executor):
+        readers = asyncio.gather(*(reader(read_executor) for _ in range(max_reads)))
+        parsers = [asyncio.create_task(parser(parse_executor)) for _ in range(workers)]
+        try:
+            # Parsers only stop early by raising; surface that rather than leave the readers blocked
+            await asyncio.wait([readers, *parsers], return_when=asyncio.FIRST_COMPLETED)
+            if not readers.done():
+                await asyncio.gather(*parsers)
+            readers.result()
+            for _ in parsers:
+                await buffers.put(_DONE)
+            await asyncio.gather(*parsers)
+        except Exception:
+            await results.put(_DONE)
+            raise
+        finally:
+            readers.cancel()
+            for task in parsers:
+                task.cancel()
+            await asyncio.gather(readers, *parsers, return_exceptions=True)
+        await results.put(_DONE)
+
+    with ThreadPoolExecutor(max_workers=max_reads, thread_name_prefix="reader") as read_executor, \
+            ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as parse_executor:
+        producer = asyncio.create_task(run(read_executor, parse_executor))
+        try:
+            while (result := await results.get()) is not _DONE:
+                summary.add(result)
+                yield result
+            await producer  # re-raises anything that went wrong while producing
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    summary.finish()
+
+
+def run_pipeline(file_paths, parse_buffer, **kwargs):
+    """Synchronous front end for iter_pipeline().
+
+    The event loop only runs while the caller asks for the next result, so a slow
+    consumer holds back new reads and parses (already submitted ones still finish).
+    """
+    loop = asyncio.new_event_loop()
+    results = iter_pipeline(file_paths, parse_buffer, **kwargs)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(results.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(results.aclose())
+        loop.close()
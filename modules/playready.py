@@ -1,14 +1,17 @@
 import base64
 import binascii
 import re
-import logging
 from typing import Union
 from construct import Struct, Int8ub, Int32ub, Bytes, this, Container, ConstructError
 from enum import IntEnum
 import construct
+from modules.logger import get_logger
+from modules.utils import select_structs, validate_lengths
+from modules.bcert import certificate_info
+from modules.stats import stage
 
 CONSTRUCT_VERSION = tuple(map(int, construct.__version__.split('.')))
-logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logging = get_logger()
 
 class BaseDevice:
     class Types(IntEnum):
@@ -48,32 +51,11 @@ class PlayReadyDeviceStruct(BaseDevice):
     
     @staticmethod
     def read_hex(file_path):
-        sl2k_offset = 0x000007D0  # PlayReady SL2000 Device + Link Root CA
-        sl3k_offset = 0x00000773  # PlayReady SL3000 Device Port + Link CA
-        device_offsets = [0x0000028C, 0x00000298, 0x000002A4]  # Offsets for Device Name
-        
         try:
             with open(file_path, "rb") as file:
                 data = file.read()
+            return PlayReadyDeviceStruct.read_hex_data(data)
 
-            security_level = "Unknown"
-            if sl2k_offset < len(data) and data[sl2k_offset:sl2k_offset+30].find(b"SL2000") != -1:
-                security_level = "SL2000"
-            elif sl3k_offset < len(data) and data[sl3k_offset:sl3k_offset+30].find(b"SL3000") != -1:
-                security_level = "SL3000"
-
-            device_parts = []
-            for offset in device_offsets:
-                if offset < len(data):
-                    string_part = data[offset:offset+20].split(b'\x00', 1)[0].decode("utf-8", errors="ignore")
-                    device_parts.append(string_part)
-
-            full_name = " ".join(filter(None, device_parts)).strip()
-            if not full_name:
-                full_name = "Unknown Device"
-
-            return {"device_name": full_name, "security_level": security_level}
-        
         except FileNotFoundError:
             logging.error(f"Error: File '{file_path}' not found.")
             return None
@@ -81,6 +63,14 @@ class PlayReadyDeviceStruct(BaseDevice):
             logging.error(f"Error reading file: {e}")
             return None
 
+    @staticmethod
+    def read_hex_data(data):
+        """Extracts the security level and device name from an already-read buffer."""
+        parsed_data = parse_playready_buffer(data)
+        if parsed_data is None:
+            return {"device_name": "Unknown Device", "security_level": "Unknown"}
+        return {"device_name": parsed_data.device_name, "security_level": parsed_data.security_level}
+
     @staticmethod
     def parse_playready_device(data: bytes):
         for version, struct in [
@@ -104,4 +94,32 @@ class PlayReadyDeviceStruct(BaseDevice):
                 logging.warning(f"Failed to parse with Version_{version}: {e}")
             except ValueError as e:
                 logging.warning(f"Validation failed for Version_{version}: {e}")
-        raise ValueError("Unable to parse PlayReady device data using available structures.")
\ No newline at end of file
+        raise ValueError("Unable to parse PlayReady device data using available structures.")
+
+
+def parse_playready_buffer(buffer, version=None):
+    """Parses an in-memory PlayReady device, trying every struct when the version is unknown."""
+    from modules.fastpath import MAX_LENGTHS, PLAYREADY_DECODERS
+
+    structs = select_structs([
+        ("Version 3", PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_3),
+        ("Version 2", PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_2),
+        ("Version 1", PlayReadyDeviceStruct.PlayReadyDeviceStructVersion_1),
+    ], version, "PlayReady", PLAYREADY_DECODERS)
+    structs = validate_lengths(structs, buffer, "PlayReady", PLAYREADY_DECODERS, MAX_LENGTHS)
+
+    buffer = memoryview(buffer)
+    for version_name, struct, end in structs:
+        try:
+            with stage(f"playready.{version_name.lower().replace(' ', '_')}"):
+                parsed_data = struct.parse(buffer[:end])
+        except Exception as e:
+            logging.warning(f"Error parsing PlayReady file with {version_name}: {e}")
+            continue
+
+        # Name and security level come from the group certificate's BasicInfo and ManufacturerInfo objects
+        with stage("playready.bcert"):
+            parsed_data.update(certificate_info(bytes(parsed_data.group_certificate)))
+        return parsed_data
+
+    return None
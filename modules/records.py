@@ -0,0 +1,208 @@
+import base64
+import struct
+from array import array
+from zlib import crc32
+from construct import Container, ConstructError
+from modules.bcert import certificate_info
+from modules.detector import HEADER_SIZE, KEYBOX_SIZE, PLAYREADY, WIDEVINE, WIDEVINE_KEYBOX, detect_format, type_from_extension
+from modules.fastpath import (
+    MAX_LENGTHS, KeyboxFast,
+    PlayReadyFastVersion_1, PlayReadyFastVersion_2, PlayReadyFastVersion_3,
+    WidevineFastVersion_1, WidevineFastVersion_2,
+)
+from modules.logger import get_logger
+
+logging = get_logger()
+
+
+class Field:
+    """Descriptor that decodes one field from the record's buffer each time it is read."""
+
+    __slots__ = ("index", "unpacker", "check")
+
+    def __init__(self, index, code=None, check=None):
+        self.index = index
+        self.unpacker = struct.Struct(">" + code) if code else None  # None: a byte string
+        self.check = check
+
+    def __get__(self, record, owner=None):
+        if record is None:
+            return self
+        start = record.offsets[2 * self.index]
+        if self.unpacker is None:
+            value = record.buffer[start:record.offsets[2 * self.index + 1]]
+        else:
+            value = self.unpacker.unpack_from(record.buffer, start)[0]
+        return self.check(value) if self.check else value
+
+
+class LazyRecord:
+    """A parsed device kept as the original buffer plus field offsets.
+
+    Fields are decoded only when read, so holding many results costs little more than
+    the files themselves. Subclasses are built per struct version by record_type().
+    """
+
+    __slots__ = ("buffer", "offsets")
+    device_type = None
+    decoder = None
+    field_names = ()
+    field_index = {}
+    derived_names = ()
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = array("I", offsets)
+
+    def raw(self, name):
+        """The field's bytes as a memoryview into the buffer."""
+        index = self.field_index[name]
+        return memoryview(self.buffer)[self.offsets[2 * index]:self.offsets[2 * index + 1]]
+
+    def hex(self, name):
+        return self.raw(name).hex()
+
+    def base64(self, name):
+        return base64.b64encode(self.raw(name)).decode("utf-8")
+
+    def keys(self):
+        return self.field_names + self.derived_names
+
+    def items(self):
+        for name in self.keys():
+            yield name, getattr(self, name)
+
+    def __getitem__(self, name):
+        if name not in self.field_index and name not in self.derived_names:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def to_dict(self, binary=None):
+        """Decodes every field; ``binary`` may be ``"hex"`` or ``"base64"`` to encode byte strings."""
+        result = {}
+        for name, value in self.items():
+            if isinstance(value, bytes):
+                if binary == "hex":
+                    value = value.hex()
+                elif binary == "base64":
+                    value = base64.b64encode(value).decode("utf-8")
+            elif isinstance(value, Container):
+                value = dict(value)
+            result[name] = value
+        return result
+
+    def to_json(self, binary="base64"):
+        import json
+
+        return json.dumps(self.to_dict(binary))
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {len(self.buffer):,} bytes>"
+
+
+class WidevineRecordBase(LazyRecord):
+    __slots__ = ()
+
+    def decode_client_id(self):
+        """The client ID's ClientIdentification fields, decoded on request (see modules.clientid)."""
+        from modules.clientid import decode_client_id
+        return decode_client_id(self.client_id)
+
+
+class PlayReadyRecordBase(LazyRecord):
+    __slots__ = ()
+    derived_names = ("device_name", "security_level")
+
+    @property
+    def device_name(self):
+        return certificate_info(self.group_certificate)["device_name"]
+
+    @property
+    def security_level(self):
+        return certificate_info(self.group_certificate)["security_level"]
+
+
+class KeyboxRecordBase(LazyRecord):
+    __slots__ = ()
+    derived_names = ("crc_valid", "crc_with_magic", "decrypted_metadata")
+
+    @property
+    def crc_valid(self):
+        return crc32(memoryview(self.buffer)[:120]) == self.body_crc
+
+    @property
+    def crc_with_magic(self):
+        return crc32(memoryview(self.buffer)[:124]) & 0xFFFFFFFF
+
+    @property
+    def decrypted_metadata(self):
+        """Device ID metadata decrypted with the device AES key (zero-padded ECB), as hex."""
+        from modules.keybox import metadata_cipher
+
+        metadata = self.device_id[4:]
+        padded_metadata = metadata + b"\x00" * (16 - len(metadata) % 16)
+        return metadata_cipher(self.device_aes_key).decrypt(padded_metadata)[:len(metadata)].hex()
+
+
+def record_type(name, device_type, decoder, base=LazyRecord):
+    """Builds a record class with one Field descriptor per field of a FastStruct layout."""
+    namespace = {
+        "__slots__": (),
+        "__module__": __name__,
+        "device_type": device_type,
+        "decoder": decoder,
+        "field_names": tuple(field_name for field_name, _ in decoder.fields),
+        "field_index": {field_name: index for index, (field_name, _) in enumerate(decoder.fields)},
+    }
+    for index, (field_name, spec) in enumerate(decoder.fields):
+        code = None if isinstance(spec, tuple) or spec.endswith("s") else spec
+        namespace[field_name] = Field(index, code, decoder.checks.get(field_name))
+    return type(name, (base,), namespace)
+
+
+WidevineRecordVersion_1 = record_type("WidevineRecordVersion_1", WIDEVINE, WidevineFastVersion_1, WidevineRecordBase)
+WidevineRecordVersion_2 = record_type("WidevineRecordVersion_2", WIDEVINE, WidevineFastVersion_2, WidevineRecordBase)
+PlayReadyRecordVersion_1 = record_type("PlayReadyRecordVersion_1", PLAYREADY, PlayReadyFastVersion_1, PlayReadyRecordBase)
+PlayReadyRecordVersion_2 = record_type("PlayReadyRecordVersion_2", PLAYREADY, PlayReadyFastVersion_2, PlayReadyRecordBase)
+PlayReadyRecordVersion_3 = record_type("PlayReadyRecordVersion_3", PLAYREADY, PlayReadyFastVersion_3, PlayReadyRecordBase)
+KeyboxRecord = record_type("KeyboxRecord", WIDEVINE_KEYBOX, KeyboxFast, KeyboxRecordBase)
+
+# Versions in the order they are tried when the header does not say
+RECORD_TYPES = {
+    WIDEVINE: {2: WidevineRecordVersion_2, 1: WidevineRecordVersion_1},
+    PLAYREADY: {3: PlayReadyRecordVersion_3, 2: PlayReadyRecordVersion_2, 1: PlayReadyRecordVersion_1},
+    WIDEVINE_KEYBOX: {None: KeyboxRecord},
+}
+
+
+def parse_record(buffer, file_path=""):
+    """Parses a binary device file into a LazyRecord, or returns None.
+
+    The record keeps ``buffer`` itself (copied once if it is not already bytes);
+    XML keyboxes have no fixed layout and are not supported.
+    """
+    if not isinstance(buffer, bytes):
+        buffer = bytes(buffer)
+
+    device_type, version = detect_format(memoryview(buffer)[:HEADER_SIZE], len(buffer))
+    if device_type is None:
+        device_type = type_from_extension(file_path)
+
+    record_types = RECORD_TYPES.get(device_type)
+    if record_types is None:
+        return None
+    if device_type == WIDEVINE_KEYBOX and len(buffer) != KEYBOX_SIZE:
+        logging.error(f"Unexpected keybox length: {len(buffer)} bytes. Expected {KEYBOX_SIZE} bytes.")
+        return None
+
+    candidates = record_types.values() if version is None else [record_types.get(version)]
+    for record_class in candidates:
+        if record_class is None:
+            logging.error(f"Unsupported {device_type} version: {version}")
+            return None
+        try:
+            return record_class(buffer, record_class.decoder.locate(buffer, MAX_LENGTHS))
+        except ConstructError as e:
+            logging.warning(f"Error locating {device_type} fields with {record_class.__name__}: {e}")
+
+    return None
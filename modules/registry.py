@@ -0,0 +1,55 @@
+import importlib
+from modules.detector import PLAYREADY, WIDEVINE, WIDEVINE_KEYBOX, WIDEVINE_KEYBOX_XML
+
+# device type -> "module:function"; handlers take (buffer, version) and return the parsed data.
+# Modules are only imported the first time a file of that type is dispatched.
+FORMAT_HANDLERS = {
+    PLAYREADY: "modules.playready:parse_playready_buffer",
+    WIDEVINE: "modules.widevine:parse_widevine_buffer",
+    WIDEVINE_KEYBOX: "modules.keybox:parse_keybox_buffer",
+    WIDEVINE_KEYBOX_XML: "modules.keybox:check_keybox_xml_buffer",
+}
+
+# device type -> "module:function"; presenters turn the stored result into the report
+# that renderers write, so encodings are only produced for records that are output.
+FORMAT_PRESENTERS = {
+    WIDEVINE_KEYBOX: "modules.keybox:keybox_report",
+}
+
+_loaded_handlers = {}
+_loaded_presenters = {}
+
+
+def _load(target):
+    module_name, function_name = target.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def register_format(device_type, target):
+    """Registers (or replaces) the handler for a device type as a "module:function" path."""
+    FORMAT_HANDLERS[device_type] = target
+    _loaded_handlers.pop(device_type, None)
+
+
+def get_handler(device_type):
+    """Imports and returns the handler for a device type, or None if the type is unknown."""
+    handler = _loaded_handlers.get(device_type)
+    if handler is None:
+        target = FORMAT_HANDLERS.get(device_type)
+        if target is None:
+            return None
+        handler = _load(target)
+        _loaded_handlers[device_type] = handler
+    return handler
+
+
+def get_presenter(device_type):
+    """Imports and returns the presenter for a device type, or None if its results are rendered as stored."""
+    presenter = _loaded_presenters.get(device_type)
+    if presenter is None:
+        target = FORMAT_PRESENTERS.get(device_type)
+        if target is None:
+            return None
+        presenter = _load(target)
+        _loaded_presenters[device_type] = presenter
+    return presenter
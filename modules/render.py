@@ -0,0 +1,210 @@
+import base64
+import hashlib
+import sys
+from colorama import Fore, Style
+from modules.registry import get_presenter
+
+BLOB_MODES = ("full", "hash", "truncate")
+
+
+def parse_blob_mode(value):
+    """Parses a --blobs value: ``full``, ``hash[:BYTES]`` or ``truncate[:BYTES]``; blobs up to BYTES (default 64) stay whole."""
+    name, _, limit = value.partition(":")
+    if name not in BLOB_MODES:
+        raise ValueError(f"unknown blob mode: {value}")
+    return name, int(limit) if limit else 64
+
+
+def encode_blob(value, blob_mode=("full", 0)):
+    """Base64-encodes a binary field, or shortens a large one to a prefix or a SHA-256 digest.
+
+    Called only when a record is rendered, so blobs that are never output cost nothing.
+    """
+    mode, limit = blob_mode
+    if mode == "full" or len(value) <= limit:
+        return base64.b64encode(value).decode("utf-8")
+    if mode == "hash":
+        return f"sha256:{hashlib.sha256(value).hexdigest()} ({len(value):,} bytes)"
+    return f"{base64.b64encode(value[:limit]).decode('utf-8')}... ({len(value):,} bytes)"
+
+
+def flatten(data, prefix=""):
+    """Yields (dotted_field, value) pairs for nested dicts."""
+    for field, value in data.items():
+        name = f"{prefix}{field}"
+        if isinstance(value, dict) and value:
+            yield from flatten(value, f"{name}.")
+        else:
+            yield name, value
+
+
+class Renderer:
+    """Writes parsed records to a stream; subclasses decide the format."""
+
+    def __init__(self, stream=None, blob_mode=("full", 0)):
+        self.stream = stream or sys.stdout
+        self.blob_mode = blob_mode
+
+    def present(self, data, device_type):
+        """The report for a stored result, built by the format's presenter when it has one."""
+        presenter = get_presenter(device_type) if data else None
+        return presenter(data) if presenter else data
+
+    def write(self, data, device_type, file_path=None):
+        raise NotImplementedError
+
+    def close(self):
+        self.stream.flush()
+
+
+def _escape(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+class TerminalRenderer(Renderer):
+    """The colored box layout of pretty_print, assembled in memory and written once per record.
+
+    The labels and colour codes of each format's layout are built once into a format
+    string, so a record costs one ``str.format`` call plus its values.
+    """
+
+    templates = {}  # (device_type, field names) -> format string; shared by every instance
+    max_templates = 256
+
+    def format_value(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return encode_blob(value, self.blob_mode)
+        elif isinstance(value, int):
+            return f"{value:,}"
+        elif isinstance(value, bool):
+            return f"{Fore.GREEN}Enabled{Style.RESET_ALL}" if value else f"{Fore.RED}Disabled{Style.RESET_ALL}"
+        elif value is None:
+            return f"{Fore.YELLOW}N/A{Style.RESET_ALL}"
+        return value
+
+    def template(self, device_type, fields):
+        """The record layout with a ``{}`` slot for the file line and one per field."""
+        key = (device_type, fields)
+        template = self.templates.get(key)
+        if template is None:
+            header = "\n".join([
+                f"\n{Fore.CYAN}╔════════════════════════════════════════════════════════════════════╗{Style.RESET_ALL}",
+                f"{Fore.CYAN}                      {Fore.YELLOW}Parsed {device_type} Data                  {Fore.CYAN} {Style.RESET_ALL}",
+                f"{Fore.CYAN}╚════════════════════════════════════════════════════════════════════╝{Style.RESET_ALL}",
+            ])
+            rows = "".join(
+                f"\n{Fore.MAGENTA}{_escape(field.replace('_', ' ').title()):<30}:{Style.RESET_ALL} {Fore.WHITE}{{}}{Style.RESET_ALL}"
+                for field in fields
+            )
+            template = f"{_escape(header)}{{}}{rows}\n{Fore.CYAN}{'═' * 70}{Style.RESET_ALL}\n\n"
+            if len(self.templates) >= self.max_templates:
+                self.templates.clear()
+            self.templates[key] = template
+        return template
+
+    def write(self, data, device_type, file_path=None):
+        data = self.present(data, device_type)
+        if not data:
+            self.stream.write(f"{Fore.RED}Failed to parse {device_type} file.{Style.RESET_ALL}\n")
+            return
+
+        file_line = f"\n{Fore.MAGENTA}{'File':<30}:{Style.RESET_ALL} {Fore.WHITE}{file_path}{Style.RESET_ALL}" if file_path else ""
+        format_value = self.format_value
+        self.stream.write(self.template(device_type, tuple(data.keys())).format(
+            file_line, *[format_value(value) for value in data.values()]))
+
+
+class NdjsonRenderer(Renderer):
+    """One JSON object per line; binary fields are encoded as they are serialized."""
+
+    def __init__(self, stream=None, blob_mode=("full", 0), buffer_records=256):
+        super().__init__(stream, blob_mode)
+        self.buffer_records = buffer_records
+        self.pending = []
+        import json
+        self.encoder = json.JSONEncoder(default=self.default, ensure_ascii=False, separators=(",", ":"))
+
+    def default(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return encode_blob(value, self.blob_mode)
+        if hasattr(value, "to_dict"):
+            return value.to_dict()
+        return str(value)
+
+    def write(self, data, device_type, file_path=None):
+        data = self.present(data, device_type)
+        self.pending.append(self.encoder.encode({"file": file_path, "device_type": device_type, "data": data}))
+        if len(self.pending) >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.pending.append("")
+            self.stream.write("\n".join(self.pending))
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+def csv_field(value):
+    """One field as csv.writer's default (excel, QUOTE_MINIMAL) dialect writes it.
+
+    The writer checks long base64 values one character at a time; ``in`` scans them in C.
+    """
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = str(value)
+    if '"' in value:
+        return '"' + value.replace('"', '""') + '"'
+    if "," in value or "\n" in value or "\r" in value:
+        return f'"{value}"'
+    return value
+
+
+class CsvRenderer(Renderer):
+    """Long-format CSV (file, device_type, field, value), so records of every format share one header.
+
+    Rows are formatted into one string and written to the stream every ``buffer_records``
+    records, instead of one write (and, on a terminal, one flush) per row.
+    """
+
+    def __init__(self, stream=None, blob_mode=("full", 0), buffer_records=256):
+        super().__init__(stream, blob_mode)
+        self.buffer_records = buffer_records
+        self.pending = ["file,device_type,field,value\r\n"]
+        self.records = 0
+
+    def write(self, data, device_type, file_path=None):
+        prefix = f"{csv_field(file_path)},{csv_field(device_type)},"
+        blob_mode = self.blob_mode
+        for field, value in flatten(self.present(data, device_type) or {}):
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                value = encode_blob(value, blob_mode)
+            self.pending.append(f"{prefix}{csv_field(field)},{csv_field(value)}\r\n")
+        self.records += 1
+        if self.records >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.stream.write("".join(self.pending))
+            self.pending = []
+        self.records = 0
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+RENDERERS = {
+    "terminal": TerminalRenderer,
+    "ndjson": NdjsonRenderer,
+    "csv": CsvRenderer,
+}
+
+
+def get_renderer(name="terminal", stream=None, blob_mode=("full", 0)):
+    return RENDERERS[name](stream, blob_mode)
@@ -0,0 +1,130 @@
+import time
+import tracemalloc
+
+_enabled = False
+_trace_memory = False
+_stages = {}
+_stack = []
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "started", "memory_start", "memory_seen")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if _trace_memory:
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+            self.memory_seen = 0
+            tracemalloc.reset_peak()
+            _stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        elapsed = time.perf_counter() - self.started
+        record = _stages.get(self.name)
+        if record is None:
+            record = _stages[self.name] = [0, 0, 0.0, 0]
+        record[0] += 1
+        record[2] += elapsed
+        if exc_type is not None:
+            record[1] += 1
+
+        if _trace_memory:
+            _stack.pop()
+            # Nested stages reset the tracemalloc peak, so they hand theirs up the stack
+            absolute_peak = max(tracemalloc.get_traced_memory()[1], self.memory_seen)
+            record[3] = max(record[3], absolute_peak - self.memory_start)
+            if _stack:
+                _stack[-1].memory_seen = max(_stack[-1].memory_seen, absolute_peak)
+        return False
+
+
+def stage(name):
+    """Context manager timing one stage; a shared no-op object when stats are disabled.
+
+    An exception escaping the block counts as a failed call (e.g. a rejected struct version).
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def enable(trace_memory=False):
+    global _enabled, _trace_memory
+    _enabled = True
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global _enabled, _trace_memory
+    _enabled = False
+    _trace_memory = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def tracing_memory():
+    return _trace_memory
+
+
+def collect(reset=True):
+    """Returns ``{stage: [calls, failures, seconds, peak_bytes]}`` and optionally starts over."""
+    snapshot = {name: list(record) for name, record in _stages.items()}
+    if reset:
+        _stages.clear()
+    return snapshot
+
+
+def merge(snapshot):
+    """Adds a snapshot from another process (e.g. a batch worker) to this one."""
+    for name, (calls, failures, seconds, peak) in snapshot.items():
+        record = _stages.get(name)
+        if record is None:
+            _stages[name] = [calls, failures, seconds, peak]
+        else:
+            record[0] += calls
+            record[1] += failures
+            record[2] += seconds
+            record[3] = max(record[3], peak)
+
+
+def report():
+    """Stage records as plain dicts, slowest total first."""
+    rows = []
+    for name, (calls, failures, seconds, peak) in sorted(_stages.items(), key=lambda item: -item[1][2]):
+        rows.append({
+            "stage": name,
+            "calls": calls,
+            "failures": failures,
+            "total_ms": seconds * 1000,
+            "mean_us": seconds / calls * 1e6 if calls else 0.0,
+            "peak_bytes": peak if _trace_memory else None,
+        })
+    return rows
+
+
+def dump(path):
+    import json
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"trace_memory": _trace_memory, "stages": report()}, file, indent=2)
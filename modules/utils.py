@@ -1,4 +1,115 @@
 import base64
+import mmap
+import os
+from contextlib import contextmanager
+from modules.logger import get_logger
+from modules.stats import stage
+
+# Bump whenever parsed output changes so persisted parse caches are invalidated
+PARSER_VERSION = "1.9"
 
 def convert_bytes_to_base64(byte_data):
-    return base64.b64encode(byte_data).decode("utf-8")
\ No newline at end of file
+    return base64.b64encode(byte_data).decode("utf-8")
+
+def normalize_result(data):
+    """Converts construct Containers and nested dicts into plain, picklable dicts."""
+    if isinstance(data, dict):
+        return {key: normalize_result(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return type(data)(normalize_result(value) for value in data)
+    if isinstance(data, (bytearray, memoryview)):
+        return bytes(data)
+    return data
+
+
+# Files at least this large are memory-mapped instead of read into a bytes object
+MMAP_THRESHOLD = 1024 * 1024
+
+
+@contextmanager
+def read_buffer(file_path, mmap_threshold=MMAP_THRESHOLD):
+    """Reads a file exactly once and yields a memoryview over its contents.
+
+    Large files are memory-mapped; slices taken from the view must not outlive the block.
+    """
+    with open(file_path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < mmap_threshold or size == 0:
+            with stage("read"):
+                view = memoryview(file.read())
+            try:
+                yield view
+            finally:
+                view.release()
+            return
+
+        with stage("read"):
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapping)
+        try:
+            yield view
+        finally:
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:
+                # A caller still holds a slice; the mapping is closed when it is collected
+                pass
+
+
+@contextmanager
+def transaction(connection):
+    """Runs the block in one write transaction on an autocommit (``isolation_level=None``) sqlite connection.
+
+    ``with connection:`` only commits what the sqlite3 module opened implicitly, which an
+    autocommit connection never does; here BEGIN IMMEDIATE takes the write lock up front
+    and an exception rolls the whole block back.
+    """
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+def select_structs(candidates, version, device_type, fast_decoders=None):
+    """Returns only the decoder for a detected version, or every candidate when the version is unknown.
+
+    A detected version uses its precompiled fast decoder when one exists; the construct
+    structs stay as the reference and as the fallback for trial parsing.
+    """
+    if version is None:
+        return candidates
+    for version_name, struct in candidates:
+        if version_name == f"Version {version}":
+            return [(version_name, (fast_decoders or {}).get(version, struct))]
+    get_logger().error(f"Unsupported {device_type} version: {version}")
+    return []
+
+
+def validate_lengths(candidates, buffer, device_type, fast_decoders, max_lengths):
+    """Validation pre-pass: drops the candidates whose declared lengths overrun the buffer or ``max_lengths``.
+
+    Only the fixed header fields are unpacked (FastStruct.locate), so a truncated or
+    corrupted file is rejected with one warning, before any blob is copied and before
+    the version attempts. Returns ``(version_name, struct, end)``; parsing
+    ``buffer[:end]`` keeps trailing bytes from being copied.
+    """
+    # Only the format parsers call this, and they already import construct
+    from construct import ConstructError
+
+    accepted, rejected = [], []
+    with stage("validate_lengths"):
+        for version_name, struct in candidates:
+            decoder = fast_decoders.get(int(version_name.rsplit(" ", 1)[1]))
+            try:
+                end = decoder.locate(buffer, max_lengths)[-1] if decoder is not None else len(buffer)
+            except ConstructError as e:
+                rejected.append(f"{version_name}: {str(e).splitlines()[0]}")
+                continue
+            accepted.append((version_name, struct, end))
+
+    if not accepted and rejected:
+        get_logger().warning(f"Rejected {device_type} file: {'; '.join(rejected)}")
+    return accepted
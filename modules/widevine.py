@@ -2,6 +2,11 @@ from construct import Struct, Const, Int8ub, Bytes, Int16ub, Optional, Padded, B
 from construct import Enum as CEnum
 from enum import IntEnum
 import construct
+from modules.logger import get_logger
+from modules.utils import select_structs, validate_lengths
+from modules.stats import stage
+
+logging = get_logger()
 
 # Check Construct Version
 CONSTRUCT_VERSION = tuple(map(int, construct.__version__.split('.')))
@@ -45,5 +50,24 @@ class WidevineDeviceStruct(BaseDevice):
         "client_id_len" / Int16ub,
         "client_id" / Bytes(this.client_id_len)
     )
-    
-    
+
+
+def parse_widevine_buffer(buffer, version=None):
+    """Parses an in-memory Widevine device, trying every struct when the version is unknown."""
+    from modules.fastpath import MAX_LENGTHS, WIDEVINE_DECODERS
+
+    structs = select_structs([
+        ("Version 2", WidevineDeviceStruct.WidevineDeviceStructVersion_2),
+        ("Version 1", WidevineDeviceStruct.WidevineDeviceStructVersion_1),
+    ], version, "Widevine", WIDEVINE_DECODERS)
+    structs = validate_lengths(structs, buffer, "Widevine", WIDEVINE_DECODERS, MAX_LENGTHS)
+
+    buffer = memoryview(buffer)
+    for version_name, struct, end in structs:
+        try:
+            with stage(f"widevine.{version_name.lower().replace(' ', '_')}"):
+                return struct.parse(buffer[:end])
+        except Exception as e:
+            logging.warning(f"Error parsing Widevine file with {version_name}: {e}")
+
+    return None